@@ -0,0 +1,80 @@
+"""Add registry generations and row visibility ranges
+
+Revision ID: e778330f2bbc
+Revises: eade9fc5d8e7
+Create Date: 2026-10-17 11:48:15.207361
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e778330f2bbc"
+down_revision: Union[str, None] = "eade9fc5d8e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "registry_generations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("source_type", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("row_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column("activated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_registry_generations_source_type"),
+        "registry_generations",
+        ["source_type"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_registry_generations_status"),
+        "registry_generations",
+        ["status"],
+        unique=False,
+    )
+    op.add_column(
+        "searchable_items",
+        sa.Column("gen_from", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "searchable_items", sa.Column("gen_to", sa.Integer(), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_searchable_items_gen_to"),
+        "searchable_items",
+        ["gen_to"],
+        unique=False,
+    )
+    # Уже загруженные данные становятся активным поколением своего источника
+    op.execute(
+        "INSERT INTO registry_generations "
+        "(source_type, status, row_count, created_at, activated_at) "
+        "SELECT source_type, 'active', COUNT(*), NOW(), NOW() "
+        "FROM searchable_items GROUP BY source_type"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM searchable_items WHERE gen_to IS NOT NULL")
+    op.drop_index(op.f("ix_searchable_items_gen_to"), table_name="searchable_items")
+    op.drop_column("searchable_items", "gen_to")
+    op.drop_column("searchable_items", "gen_from")
+    op.drop_index(
+        op.f("ix_registry_generations_status"), table_name="registry_generations"
+    )
+    op.drop_index(
+        op.f("ix_registry_generations_source_type"), table_name="registry_generations"
+    )
+    op.drop_table("registry_generations")
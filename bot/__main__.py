@@ -0,0 +1,9 @@
+"""
+Точка входа `python -m bot`. Модуль с именем __main__ пакета процессы пула
+нормализации (spawn) не импортируют повторно, поэтому в них не поднимаются
+ни bot.main, ни его зависимости: пулы драйверов, клиенты и движок БД.
+"""
+
+from bot.main import run
+
+run()
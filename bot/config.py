@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,6 +13,54 @@ class Settings(BaseSettings):
 
     # Scraper
     CAPGURU_API_KEY: str
+    CAPGURU_BASE_URL: str = "https://api.cap.guru"
+    CAPTCHA_MAX_WAIT: float = 110
+    URL_VERDICT_TTL_BLOCKED_HOURS: float = 24
+    URL_VERDICT_TTL_ALLOWED_HOURS: float = 6
+    # Локальная выгрузка реестра РКН (dump.csv z-i или dump.xml)
+    RKN_DUMP_PATH: str | None = None
+    RKN_DUMP_ENCODING: str = "cp1251"
+    RKN_DUMP_REFRESH_MINUTES: float = 60
+    # Отсутствие домена в выгрузке считать разрешением без проверки на сайте
+    RKN_DUMP_TRUST_MISSES: bool = False
+    # Запись о домене распространяется на его поддомены
+    RKN_DUMP_MATCH_PARENTS: bool = True
+    REGISTRY_PARALLEL: bool = True
+    REGISTRY_SCRAPE_CONCURRENCY: int = 3
+    REGISTRY_HTTP_TIMEOUT: float = 60
+    # Потоковый разбор больших таблиц (minjust, fsb) без построения DOM
+    REGISTRY_STREAMING: bool = True
+    REGISTRY_CHUNK_SIZE: int = 1000
+    REGISTRY_SPOOL_MAX_MB: int = 8
+    # Процессы для нормализации при загрузке реестров (<= 1 — без пула)
+    NORMALIZE_WORKERS: int = 2
+    # lxml и selectolax — опциональные зависимости
+    HTML_PARSER_BACKEND: Literal["html.parser", "lxml", "selectolax"] = "html.parser"
+    # Новое поколение реестра отклоняется, если в нем меньше строк,
+    # чем эта доля от предыдущего
+    REGISTRY_MIN_ROW_RATIO: float = 0.5
+    DRIVER_POOL_SIZE: int = 2
+    DRIVER_POOL_MAX_USES: int = 50
+    DRIVER_POOL_MAX_MEMORY_MB: int = 1024
+    DRIVER_POOL_CHECKOUT_TIMEOUT: float = 300
+    # Очередь проверок URL: число воркеров ограничивает одновременные браузеры
+    URL_CHECK_WORKERS: int = 2
+    URL_CHECK_POLL_SECONDS: float = 5
+    # Задача считается зависшей, если воркер столько не продлевал ее аренду;
+    # продление идет каждую пятую часть этого срока
+    URL_CHECK_JOB_TIMEOUT_MINUTES: float = 5
+    URL_CHECK_MAX_ATTEMPTS: int = 2
+
+    # Webhook: при WEBHOOK_BASE_URL бот принимает обновления по HTTP
+    WEBHOOK_BASE_URL: str | None = None
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str | None = None
+    WEBAPP_HOST: str = "0.0.0.0"
+    WEBAPP_PORT: int = 8080
+    # Одновременно обрабатываемые обновления и предел очереди, после
+    # которого вебхук отвечает 503 и Telegram повторяет доставку позже
+    MAX_CONCURRENT_UPDATES: int = 50
+    MAX_PENDING_UPDATES: int = 500
 
     # Database
     DB_HOST: str
@@ -19,6 +69,30 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # Search
+    SEARCH_STRATEGY: Literal["like", "fulltext"] = "like"
+    # Если не задано, значение читается из innodb_ft_min_token_size сервера
+    FT_MIN_TOKEN_SIZE: int | None = None
+
+    # FSM
+    FSM_STATE_TTL_MINUTES: float = 60
+    FSM_MEMORY_MAX_KEYS: int = 10000
+    # Запись состояний в MySQL: переживают рестарт и общие для реплик
+    FSM_PERSIST: bool = False
+    # Сколько секунд состояние из MySQL отдается из памяти без перечитывания
+    FSM_MEMORY_FRESH_SECONDS: float = 5
+
+    # Метрики Prometheus: локальный эндпоинт /metrics, None — выключен
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int | None = 9100
+
+    # Трассировка: разбивка по спанам для запросов дольше порога, None — выключено
+    TRACE_SLOW_SECONDS: float | None = 5
+    # Логи в формате JSON (одна запись — одна строка)
+    LOG_JSON: bool = False
+    # Записей в очереди логов; при переполнении новые INFO отбрасываются
+    LOG_QUEUE_SIZE: int = 10000
+
     @property
     def DATABASE_URL_asyncpg(self) -> str:
         return f"mysql+aiomysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -0,0 +1,166 @@
+from functools import lru_cache
+
+# Публичные суффиксы, под которыми регистрируют домены: выше них совпадение
+# по родительскому домену не ищется (запись "com.ru" не блокирует весь com.ru)
+PUBLIC_SUFFIXES = frozenset(
+    {
+        # ccTLD и их зоны второго уровня
+        "ru", "xn--p1ai", "su", "by", "kz", "ua", "uz", "am", "az", "ge", "kg",
+        "md", "tj", "tm", "de", "uk", "fr", "it", "es", "nl", "pl", "cz", "lt",
+        "lv", "ee", "fi", "se", "no", "cn", "jp", "in", "us", "ca", "au", "br",
+        "tr", "il", "io", "me", "co", "tv", "cc", "ws", "to", "ly", "gg", "fm",
+        "com.ru", "net.ru", "org.ru", "pp.ru", "msk.ru", "spb.ru", "msk.su",
+        "spb.su", "com.ua", "kiev.ua", "org.ua", "net.ua", "in.ua", "com.kz",
+        "org.kz", "com.by", "co.uk", "org.uk", "me.uk", "ltd.uk", "com.cn",
+        "co.jp", "co.in", "com.au", "com.br", "com.tr", "co.il",
+        # gTLD
+        "com", "net", "org", "info", "biz", "pro", "name", "mobi", "xyz",
+        "top", "site", "online", "club", "shop", "store", "space", "live",
+        "app", "dev", "tech", "news", "world", "link", "click", "best",
+        "moscow", "xn--80adxhks", "xn--d1acj3b", "xn--80asehdb", "xn--c1avg",
+        # Хостинги пользовательских поддоменов
+        "blogspot.com", "github.io", "narod.ru", "ucoz.ru", "tilda.ws",
+        "livejournal.com", "wordpress.com", "appspot.com", "herokuapp.com",
+    }
+)  # fmt: skip
+
+_EXACT = 1
+_WILDCARD = 2
+# Хост из записи о странице: блокирует только страницу, не весь домен
+_URL = 4
+# Ключ флагов во внутреннем узле; метки домена пустыми не бывают
+_FLAGS = ""
+
+
+@lru_cache(maxsize=65536)
+def _idna_encode(host: str) -> str:
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def to_ascii_host(host: str) -> str:
+    """Каноническая форма хоста: нижний регистр, без точки в конце, punycode."""
+    host = host.strip().lower().rstrip(".")
+    if host and not host.isascii():
+        host = _idna_encode(host)
+    return host
+
+
+def canonical_host(host: str) -> str:
+    host = to_ascii_host(host)
+    return host[4:] if host.startswith("www.") else host
+
+
+def host_from_url(url: str) -> str:
+    # Быстрее urlsplit: на выгрузке в миллионы строк разбор URL — основная
+    # часть времени загрузки
+    url = url.strip()
+    start = url.find("://")
+    start = start + 3 if start >= 0 else 0
+    end = len(url)
+    for separator in "/?#":
+        position = url.find(separator, start, end)
+        if position >= 0:
+            end = position
+    netloc = url[start:end].rpartition("@")[2]
+    if netloc.startswith("["):
+        host = netloc[1:].partition("]")[0]
+    else:
+        host = netloc.partition(":")[0]
+    return canonical_host(host)
+
+
+def public_suffix_size(labels: list[str]) -> int:
+    """Число меток публичного суффикса для меток в обратном порядке."""
+    size = 1
+    suffix = labels[0] if labels else ""
+    for depth in range(1, len(labels)):
+        suffix = f"{labels[depth]}.{suffix}"
+        if suffix in PUBLIC_SUFFIXES:
+            size = depth + 1
+    return size
+
+
+class DomainTrie:
+    """
+    Суффиксное дерево по меткам домена в обратном порядке (ru -> example ->
+    sub). Узел без потомков хранится числом-флагами, а не словарем, поэтому
+    миллионы листовых доменов не порождают миллионы словарей.
+    """
+
+    __slots__ = ("_root", "size")
+
+    def __init__(self):
+        self._root: dict = {}
+        self.size = 0
+
+    def add(self, host: str, wildcard: bool = False, url: bool = False):
+        """
+        host — уже в канонической форме (canonical_host). url=True — хост
+        из записи о странице: совпадает только сам хост и как родительский
+        домен не учитывается.
+        """
+        labels = host.split(".")[::-1]
+        if not labels or not all(labels):
+            return
+        flag = _WILDCARD if wildcard else _URL if url else _EXACT
+        node = self._root
+        for label in labels[:-1]:
+            child = node.get(label)
+            if not isinstance(child, dict):
+                child = {} if child is None else {_FLAGS: child}
+                node[label] = child
+            node = child
+
+        last = labels[-1]
+        child = node.get(last)
+        if isinstance(child, dict):
+            if not child.get(_FLAGS):
+                self.size += 1
+            child[_FLAGS] = child.get(_FLAGS, 0) | flag
+        else:
+            if child is None:
+                self.size += 1
+            node[last] = (child or 0) | flag
+
+    def match(self, host: str, parents: bool = True) -> str | None:
+        """
+        За один проход от корня возвращает вид совпадения: "exact",
+        "wildcard" (маска *.домен на любом уровне выше, включая сам домен),
+        "url" (хост заблокированной страницы) или "parent" (запись о
+        родительском домене не выше регистрируемого).
+        """
+        labels = to_ascii_host(host).split(".")[::-1]
+        if not labels or not all(labels):
+            return None
+        parent_min_depth = public_suffix_size(labels) + 1
+
+        found = None
+        node = self._root
+        for depth, label in enumerate(labels, 1):
+            child = node.get(label)
+            if child is None:
+                break
+            flags = child.get(_FLAGS, 0) if isinstance(child, dict) else child
+            if depth == len(labels):
+                if flags & _EXACT:
+                    return "exact"
+                if flags & _WILDCARD:
+                    return "wildcard"
+                if flags & _URL:
+                    return "url"
+            elif flags & _WILDCARD:
+                found = "wildcard"
+            elif (
+                parents
+                and flags & _EXACT
+                and depth >= parent_min_depth
+                and found is None
+            ):
+                found = "parent"
+            if not isinstance(child, dict):
+                break
+            node = child
+        return found
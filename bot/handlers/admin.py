@@ -3,7 +3,11 @@ from aiogram.filters import Command
 from aiogram.types import Message
 
 from bot.config import settings
-from bot.services import UserService
+from bot.services import (
+    UserService,
+    registry_refresh_stats,
+    url_verdict_cache_stats,
+)
 
 router = Router()
 
@@ -46,3 +50,28 @@ async def cmd_delsub(message: Message, user_service: UserService):
             f"Возможно, у пользователя нет активной подписки или такой ID не найден.",
             parse_mode="HTML",
         )
+
+
+@router.message(Command("cachestats"))
+async def cmd_cachestats(message: Message):
+    """
+    Показывает статистику кэшей с момента запуска бота.
+    """
+    stats = url_verdict_cache_stats
+    registries = "\n".join(
+        f"{name}: обновлен <code>{registry_refresh_stats.refreshed.get(name, 0)}</code>, "
+        f"пропущен <code>{registry_refresh_stats.skipped.get(name, 0)}</code>"
+        for name in sorted(
+            registry_refresh_stats.refreshed.keys()
+            | registry_refresh_stats.skipped.keys()
+        )
+    )
+    await message.answer(
+        f"<b>Кэш вердиктов по URL</b>\n\n"
+        f"Попаданий: <code>{stats.hits}</code>\n"
+        f"Промахов: <code>{stats.misses}</code>\n"
+        f"Hit ratio: <code>{stats.hit_ratio:.1%}</code>\n\n"
+        f"<b>Обновления реестров</b>\n\n"
+        f"{registries or 'Еще не выполнялись.'}",
+        parse_mode="HTML",
+    )
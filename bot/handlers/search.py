@@ -8,15 +8,10 @@ from bot.fsm import Search
 from bot.keyboards import get_payment_kb
 from bot.services import UserService, SearchService
 from bot.config import settings
+from bot.url_checks import url_check_queue
 from bot.utils import normalize_url_for_search
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
-
 logger = logging.getLogger(__name__)
 
 router = Router()
@@ -149,7 +144,6 @@ async def process_url_search(
     message: Message,
     state: FSMContext,
     user_service: UserService,
-    search_service: SearchService,
 ):
     user_id = message.from_user.id
     url = message.text.strip()
@@ -160,21 +154,14 @@ async def process_url_search(
         f"Проверяю <code>{normalized_url}</code>...", parse_mode="HTML"
     )
 
-    verdict = await search_service.check_url(normalized_url)
-
-    if verdict == "CAPTCHA_SERVICE_FAILED":
-        await waiting_msg.edit_text(
-            "❗️ **Проверка не удалась.**\n\n"
-            "Сервис временно перегружен или недоступен. Пожалуйста, попробуйте позже.\n\n"
-            "Ваш платеж **не был списан**."
-        )
-        return
-
-    if not await user_service.has_active_subscription(user_id):
-        await user_service.spend_credit(user_id)
-    await user_service.update_user_url_check_time(user_id)
-
-    await waiting_msg.edit_text(verdict, parse_mode="Markdown")
+    # Проверка идет в воркере, результат придет правкой этого сообщения
+    await url_check_queue.submit(
+        telegram_id=user_id,
+        chat_id=waiting_msg.chat.id,
+        message_id=waiting_msg.message_id,
+        url=normalized_url,
+        charge_credit=not await user_service.has_active_subscription(user_id),
+    )
 
 
 @router.callback_query(F.data.startswith("payload_"))
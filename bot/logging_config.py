@@ -1,24 +1,33 @@
+import atexit
 import logging.config
+from logging.handlers import QueueListener
+
+from bot.config import settings
+from bot.logging_handlers import BoundedQueueHandler, CorrelationIdFilter, JsonFormatter
+
+_FORMATTER = "json_formatter" if settings.LOG_JSON else "default_formatter"
 
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
         "default_formatter": {
-            "format": "%(asctime)s - [%(levelname)-8s] - %(name)s - %(message)s"
+            "format": "%(asctime)s - [%(levelname)-8s] - [%(correlation_id)s] - "
+            "%(name)s - %(message)s"
         },
+        "json_formatter": {"()": JsonFormatter},
     },
     "handlers": {
         "stream_handler": {
             "class": "logging.StreamHandler",
-            "formatter": "default_formatter",
+            "formatter": _FORMATTER,
         },
         "rotating_file_handler": {
             "class": "logging.handlers.RotatingFileHandler",
             "filename": "logs/bot.log",
             "maxBytes": 1024 * 1024 * 5,
             "backupCount": 5,
-            "formatter": "default_formatter",
+            "formatter": _FORMATTER,
             "encoding": "utf-8",
         },
     },
@@ -38,3 +47,26 @@ LOGGING_CONFIG = {
         },
     },
 }
+
+
+def setup_logging() -> QueueListener:
+    """
+    Применяет LOGGING_CONFIG и переносит обработчики root в фоновый поток:
+    в root остается только BoundedQueueHandler, запись на диск и в консоль
+    идет в QueueListener, и event loop на вводе-выводе не блокируется.
+    """
+    logging.config.dictConfig(LOGGING_CONFIG)
+    root = logging.getLogger()
+    writers = list(root.handlers)
+    for handler in writers:
+        root.removeHandler(handler)
+
+    queue_handler = BoundedQueueHandler(settings.LOG_QUEUE_SIZE)
+    # correlation id берется из контекста вызывающего, до передачи в поток
+    queue_handler.addFilter(CorrelationIdFilter())
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(queue_handler.queue, *writers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
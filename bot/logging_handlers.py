@@ -0,0 +1,103 @@
+import copy
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+
+from scraper_tool.tracing import current_correlation_id
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Добавляет в запись correlation id текущей трассы ("-" вне трассы)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = current_correlation_id() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна JSON-строка."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        spans = getattr(record, "spans", None)
+        if spans is not None:
+            payload["spans"] = spans
+        # После BoundedQueueHandler.prepare трассировка приходит уже текстом
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+_EXC_FORMATTER = logging.Formatter()
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Кладет записи в ограниченную очередь и никогда не ждет. При переполнении
+    INFO и ниже отбрасываются, WARNING и выше вытесняют самую старую запись.
+    Число потерянных записей сообщается, когда очередь освободится наполовину.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Стандартный prepare вклеивает трассировку в msg, и JSON-формат
+        # теряет поле exc_info. Здесь сообщение форматируется заранее, а
+        # трассировка сохраняется отдельно текстом в exc_text: объект
+        # исключения держал бы кадры стека до записи в фоновом потоке
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                pass
+        self.dropped += 1
+
+    def emit(self, record: logging.LogRecord):
+        # handle() держит блокировку обработчика, счетчик меняется под ней
+        if self.dropped and self.queue.qsize() < self.queue.maxsize // 2:
+            dropped, self.dropped = self.dropped, 0
+            self.enqueue(
+                logging.makeLogRecord(
+                    {
+                        "name": __name__,
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": f"Очередь логов переполнена, потеряно записей: {dropped}.",
+                        "correlation_id": "-",
+                    }
+                )
+            )
+        super().emit(record)
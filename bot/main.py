@@ -2,24 +2,52 @@ import asyncio
 import logging
 import os
 
-from logging.config import dictConfig
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from db.engine import async_session_factory
+from db.engine import LazySession, async_session_factory
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 
 from bot.config import settings
 from bot.handlers import common, profile, search, admin
 from db.repository import UserRepo, CacheRepo
-from bot.services import UserService, SearchService, run_scrapers_and_update_cache
-from bot.logging_config import LOGGING_CONFIG
+from bot.services import (
+    UserService,
+    SearchService,
+    captcha_solver,
+    driver_pool,
+    purge_expired_url_verdicts,
+    refresh_rkn_dump,
+    refresh_search_index,
+    registry_http_client,
+    run_scrapers_and_update_cache,
+    shutdown_normalize_executor,
+)
+from bot.logging_config import setup_logging
+from bot.metrics import (
+    HandlerMetricsMiddleware,
+    start_metrics_server,
+    updates_pending,
+)
+from bot.storage import fsm_storage, purge_expired_fsm_states
+from bot.url_checks import (
+    purge_finished_url_checks,
+    requeue_stale_url_checks,
+    url_check_queue,
+)
+from bot.webhook import ConcurrencyLimiter, run_webhook
+from scraper_tool.tracing import start_trace
 from aiogram.types import BotCommand, BotCommandScopeDefault
 
-if not os.path.exists("logs"):
-    os.makedirs("logs")
-dictConfig(LOGGING_CONFIG)
+
+class TracingMiddleware:
+    """Трасса на каждое обновление; correlation id — номер обновления."""
+
+    async def __call__(self, handler, event, data):
+        with start_trace(
+            "update", f"upd-{event.update_id}", settings.TRACE_SLOW_SECONDS
+        ):
+            return await handler(event, data)
 
 
 class DIMiddleware:
@@ -27,12 +55,16 @@ class DIMiddleware:
         self.session_factory = session_factory
 
     async def __call__(self, handler, event, data):
-        async with self.session_factory() as session:
+        # Сессия открывается только при первом запросе к БД
+        session = LazySession(self.session_factory)
+        try:
             data["user_repo"] = UserRepo(session)
             data["cache_repo"] = CacheRepo(session)
             data["user_service"] = UserService(data["user_repo"])
             data["search_service"] = SearchService(data["cache_repo"])
             return await handler(event, data)
+        finally:
+            await session.close()
 
 
 async def set_main_menu(bot: Bot):
@@ -47,12 +79,26 @@ async def set_main_menu(bot: Bot):
 
 
 async def main():
+    # Не на уровне модуля: дочерние процессы пула нормализации (spawn)
+    # импортируют главный модуль заново и открыли бы свой logs/bot.log
+    if not os.path.exists("logs"):
+        os.makedirs("logs")
+    setup_logging()
+
     bot = Bot(token=settings.BOT_TOKEN)
 
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    dp = Dispatcher(storage=fsm_storage)
 
+    limiter = ConcurrencyLimiter(
+        settings.MAX_CONCURRENT_UPDATES, settings.MAX_PENDING_UPDATES
+    )
+    dp.update.outer_middleware(TracingMiddleware())
+    dp.update.outer_middleware(limiter)
     dp.update.middleware(DIMiddleware(async_session_factory))
+    updates_pending.function = lambda: limiter.pending
+    handler_metrics = HandlerMetricsMiddleware()
+    for observer in (dp.message, dp.callback_query, dp.pre_checkout_query):
+        observer.middleware(handler_metrics)
 
     dp.include_router(admin.router)
     dp.include_router(common.router)
@@ -73,19 +119,81 @@ async def main():
         id="update_cache_job",
         replace_existing=True,
     )
+    scheduler.add_job(
+        refresh_rkn_dump,
+        "interval",
+        minutes=settings.RKN_DUMP_REFRESH_MINUTES,
+        id="refresh_rkn_dump_job",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        purge_expired_url_verdicts,
+        "interval",
+        hours=24,
+        id="purge_url_verdicts_job",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        purge_expired_fsm_states,
+        "interval",
+        hours=1,
+        id="purge_fsm_states_job",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        requeue_stale_url_checks,
+        "interval",
+        minutes=10,
+        id="requeue_url_checks_job",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        purge_finished_url_checks,
+        "interval",
+        hours=24,
+        id="purge_url_checks_job",
+        replace_existing=True,
+    )
     await set_main_menu(bot)
+    await refresh_search_index()
+    await refresh_rkn_dump()
     logging.info("Starting initial data scraping...")
     await run_scrapers_and_update_cache()
     logging.info("Initial scraping finished.")
     scheduler.start()
 
-    logging.info("Starting bot polling...")
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
-
+    await driver_pool.start()
+    await url_check_queue.start(bot)
+    metrics_runner = None
+    if settings.METRICS_PORT:
+        metrics_runner = await start_metrics_server(
+            settings.METRICS_HOST, settings.METRICS_PORT
+        )
 
-if __name__ == "__main__":
+    try:
+        if settings.WEBHOOK_BASE_URL:
+            logging.info("Starting bot webhook...")
+            await run_webhook(dp, bot, limiter)
+        else:
+            logging.info("Starting bot polling...")
+            await bot.delete_webhook(drop_pending_updates=True)
+            await dp.start_polling(bot)
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await url_check_queue.close()
+        await driver_pool.close()
+        await captcha_solver.close()
+        await registry_http_client.close()
+        shutdown_normalize_executor()
+
+
+def run():
     try:
         asyncio.run(main())
     except (KeyboardInterrupt, SystemExit):
         logging.info("Bot stopped.")
+
+
+if __name__ == "__main__":
+    run()
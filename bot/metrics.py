@@ -0,0 +1,68 @@
+import logging
+import time
+
+from aiohttp import web
+
+from scraper_tool.metrics import CONTENT_TYPE, REGISTRY, Gauge, Histogram
+from scraper_tool.tracing import span
+
+logger = logging.getLogger(__name__)
+
+handler_seconds = Histogram(
+    "handler_seconds",
+    "Время выполнения обработчика обновления",
+    ("handler",),
+)
+search_seconds = Histogram(
+    "search_seconds",
+    "Время поиска совпадения по реестрам (find_first_match)",
+    ("backend",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Ожидание соединения из пула БД",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Соединений БД, выданных из пула",
+)
+updates_pending = Gauge(
+    "updates_pending",
+    "Принятые, но еще не обработанные обновления",
+)
+
+
+class HandlerMetricsMiddleware:
+    """
+    Внутренний middleware: время каждого обработчика по имени его функции,
+    в метрике и спаном в трассе обновления.
+    """
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        started = time.perf_counter()
+        try:
+            with span(f"handler:{name}"):
+                return await handler(event, data)
+        finally:
+            handler_seconds.labels(name).observe(time.perf_counter() - started)
+
+
+async def metrics_view(request: web.Request) -> web.Response:
+    return web.Response(
+        body=REGISTRY.render().encode("utf-8"),
+        headers={"Content-Type": CONTENT_TYPE},
+    )
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_view)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics.")
+    return runner
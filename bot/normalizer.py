@@ -1,32 +1,62 @@
 import re
+from functools import lru_cache
 from transliterate import translit
-from typing import Optional
+from typing import Iterable, Optional
+
+_QUERY_CLEAN_RE = re.compile(r'[\s,;*"\n«»]+')
+_ALIAS_RE = re.compile(r"\((.*?)\)")
+_OGRN_ALIAS_RE = re.compile(r"ОГРН: «(.*?)»")
+_VARIANT_CLEAN_RE = re.compile(r'[,;*"\n«»]')
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Входит в content_hash вместо самого search_vector: поднимается при любом
+# изменении normalize_for_search, чтобы строки реестров пересобрались
+SEARCH_VECTOR_VERSION = 1
+
+
+def split_search_query(query: str) -> list[str]:
+    clean_query = _QUERY_CLEAN_RE.sub(" ", query).strip().lower().replace("ё", "е")
+    return clean_query.split()
+
+
+@lru_cache(maxsize=65536)
+def _translit_token(token: str) -> str:
+    # Транслитерация ru посимвольная, поэтому кэшируется по словам:
+    # формы организаций, фамилии и алиасы повторяются из строки в строку
+    return translit(token, "ru", reversed=True)
 
 
 def normalize_for_search(name: str, details: Optional[str] = None) -> str:
-    aliases = re.findall(r"\((.*?)\)", name)
+    aliases = _ALIAS_RE.findall(name)
 
     if details:
-        detail_aliases = re.findall(r"ОГРН: «(.*?)»", details)
+        detail_aliases = _OGRN_ALIAS_RE.findall(details)
         aliases.extend(detail_aliases)
 
-    base_name = re.sub(r"\(.*?\)", "", name).strip()
+    base_name = _ALIAS_RE.sub("", name).strip()
 
     all_variants = [base_name] + aliases
 
-    processed_variants = set()
+    # dict вместо set: порядок вариантов не зависит от PYTHONHASHSEED,
+    # и search_vector строки одинаков в любом процессе
+    processed_variants = {}
     for variant in all_variants:
-        cleaned = re.sub(r'[,;*"\n«»]', " ", variant)
-        cleaned = re.sub(r"\s+", " ", cleaned).strip()
+        cleaned = _VARIANT_CLEAN_RE.sub(" ", variant)
+        cleaned = _WHITESPACE_RE.sub(" ", cleaned).strip()
         if not cleaned:
             continue
 
         cyrillic_variant = cleaned.lower().replace("ё", "е")
 
-        latin_variant = translit(cyrillic_variant, "ru", reversed=True)
+        latin_variant = " ".join(map(_translit_token, cyrillic_variant.split(" ")))
 
-        processed_variants.add(cyrillic_variant)
+        processed_variants[cyrillic_variant] = None
         if latin_variant != cyrillic_variant:
-            processed_variants.add(latin_variant)
+            processed_variants[latin_variant] = None
+
+    return " ".join(processed_variants)
+
 
-    return " ".join(list(processed_variants))
+def normalize_batch(rows: Iterable[tuple[str, Optional[str]]]) -> list[str]:
+    """Нормализует порцию (name, details); вызывается в пуле процессов."""
+    return [normalize_for_search(name, details) for name, details in rows]
@@ -0,0 +1,179 @@
+import ipaddress
+import logging
+import os
+import time
+from xml.etree.ElementTree import iterparse
+
+from bot.domains import DomainTrie, canonical_host, host_from_url
+
+logger = logging.getLogger(__name__)
+
+
+class RknDumpSnapshot:
+    """
+    Домены и маски *.domain из выгрузки реестра РКН в суффиксном дереве,
+    IP — в хеш-множестве, подсети — в множествах адресов сетей по длине
+    префикса: проверка адреса — не больше одного поиска на длину префикса.
+    """
+
+    __slots__ = ("domains", "ips", "subnets", "subnet_count")
+
+    def __init__(self):
+        self.domains = DomainTrie()
+        self.ips: set[str] = set()
+        # (версия IP, длина префикса) -> адреса сетей числами
+        self.subnets: dict[tuple[int, int], set[int]] = {}
+        self.subnet_count = 0
+
+    def add_domain(self, value: str):
+        value = value.strip()
+        if value.startswith("*."):
+            host = canonical_host(value[2:])
+            if host:
+                self.domains.add(host, wildcard=True)
+        else:
+            host = canonical_host(value)
+            if host:
+                self.domains.add(host)
+
+    def add_url(self, value: str):
+        host = host_from_url(value)
+        if host:
+            self.domains.add(host, url=True)
+
+    def add_ip(self, value: str):
+        value = value.strip()
+        if not value:
+            return
+        if "/" not in value:
+            self.ips.add(value)
+            return
+        try:
+            network = ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            return
+        key = (network.version, network.prefixlen)
+        addresses = self.subnets.setdefault(key, set())
+        address = int(network.network_address)
+        if address not in addresses:
+            addresses.add(address)
+            self.subnet_count += 1
+
+    def _in_subnet(self, host: str) -> bool:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        bits = address.max_prefixlen
+        value = int(address)
+        for (version, prefixlen), addresses in self.subnets.items():
+            if version != address.version:
+                continue
+            shift = bits - prefixlen
+            if (value >> shift) << shift in addresses:
+                return True
+        return False
+
+    def match(self, host: str, parents: bool = True) -> str | None:
+        host = canonical_host(host)
+        if not host:
+            return None
+        if host in self.ips:
+            return "ip"
+        if self.subnets and self._in_subnet(host):
+            return "subnet"
+        return self.domains.match(host, parents=parents)
+
+
+def _load_csv(path: str, encoding: str, snapshot: RknDumpSnapshot):
+    """
+    Формат z-i dump.csv: первая строка — дата обновления, далее
+    "ip | ip;домен;url | url;организация;номер решения;дата".
+    """
+    with open(path, encoding=encoding, errors="replace") as dump:
+        next(dump, None)
+        for line in dump:
+            fields = line.rstrip("\r\n").split(";", 3)
+            if len(fields) < 3:
+                continue
+            ips, domain, urls = fields[:3]
+            for ip in ips.split("|"):
+                snapshot.add_ip(ip)
+            for url in urls.split("|"):
+                snapshot.add_url(url)
+            if domain:
+                snapshot.add_domain(domain)
+
+
+def _load_xml(path: str, snapshot: RknDumpSnapshot):
+    """Официальная dump.xml; кодировка берется из XML-декларации."""
+    handlers = {
+        "domain": snapshot.add_domain,
+        "url": snapshot.add_url,
+        "ip": snapshot.add_ip,
+        "ipSubnet": snapshot.add_ip,
+    }
+    events = iterparse(path, events=("start", "end"))
+    _, root = next(events)
+    for event, element in events:
+        if event != "end":
+            continue
+        handler = handlers.get(element.tag)
+        if handler is not None and element.text:
+            handler(element.text)
+        elif element.tag == "content":
+            # Разобранные записи отцепляются от корня, иначе дерево всей
+            # выгрузки копится в памяти
+            root.clear()
+
+
+class RknDump:
+    """
+    Локальное зеркало выгрузки РКН. Файл читается построчно (или потоково
+    для XML), новый снимок подменяет старый целиком; неизменившийся файл
+    повторно не разбирается.
+    """
+
+    def __init__(self):
+        self._snapshot: RknDumpSnapshot | None = None
+        self._signature: tuple[int, int] | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self, path: str, encoding: str = "cp1251") -> bool:
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            logger.info(f"Выгрузка РКН '{path}' не изменилась, загрузка пропущена.")
+            return False
+
+        started = time.monotonic()
+        snapshot = RknDumpSnapshot()
+        if path.lower().endswith(".xml"):
+            _load_xml(path, snapshot)
+        else:
+            _load_csv(path, encoding, snapshot)
+
+        self._snapshot = snapshot
+        self._signature = signature
+        logger.info(
+            f"Выгрузка РКН загружена за {time.monotonic() - started:.1f} с: "
+            f"доменов и масок {snapshot.domains.size}, IP {len(snapshot.ips)}, "
+            f"подсетей {snapshot.subnet_count}."
+        )
+        return True
+
+    def match(self, host: str, parents: bool = True) -> str | None:
+        """
+        Вид совпадения ("exact", "wildcard", "url", "parent", "ip", "subnet")
+        или None.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("Выгрузка РКН еще не загружена.")
+        return snapshot.match(host, parents=parents)
+
+
+rkn_dump = RknDump()
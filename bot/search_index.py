@@ -0,0 +1,112 @@
+import logging
+from collections import defaultdict
+from typing import Iterable
+
+from bot.normalizer import split_search_query
+
+logger = logging.getLogger(__name__)
+
+_GRAM_SIZE = 3
+
+
+def _grams(word: str) -> set[str]:
+    return {word[i : i + _GRAM_SIZE] for i in range(len(word) - _GRAM_SIZE + 1)}
+
+
+class IndexSnapshot:
+    """
+    Неизменяемый снимок индекса: токен -> список позиций записей,
+    плюс триграммы токенов для подстрочного поиска (как LIKE '%word%').
+    """
+
+    __slots__ = ("item_ids", "vectors", "tokens", "postings", "grams")
+
+    def __init__(self, rows: Iterable[tuple[int, str]]):
+        self.item_ids: list[int] = []
+        self.vectors: list[str] = []
+        self.tokens: list[str] = []
+        self.postings: list[list[int]] = []
+
+        token_ids: dict[str, int] = {}
+        grams: dict[str, set[int]] = defaultdict(set)
+
+        for item_id, vector in rows:
+            position = len(self.vectors)
+            self.item_ids.append(item_id)
+            self.vectors.append(vector)
+            for token in set(vector.split()):
+                token_id = token_ids.get(token)
+                if token_id is None:
+                    token_id = len(self.tokens)
+                    token_ids[token] = token_id
+                    self.tokens.append(token)
+                    self.postings.append([])
+                    for gram in _grams(token):
+                        grams[gram].add(token_id)
+                self.postings[token_id].append(position)
+
+        self.grams: dict[str, frozenset[int]] = {
+            gram: frozenset(ids) for gram, ids in grams.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _tokens_containing(self, word: str) -> list[int]:
+        gram_sets = []
+        for gram in _grams(word):
+            ids = self.grams.get(gram)
+            if not ids:
+                return []
+            gram_sets.append(ids)
+        gram_sets.sort(key=len)
+        candidates = gram_sets[0].intersection(*gram_sets[1:])
+        return [token_id for token_id in candidates if word in self.tokens[token_id]]
+
+    def find_first_match(self, query_words: list[str]) -> bool:
+        if not query_words:
+            return False
+
+        words = sorted(set(query_words), key=len, reverse=True)
+        driver, rest = words[0], words[1:]
+
+        if len(driver) < _GRAM_SIZE:
+            return any(all(w in vector for w in words) for vector in self.vectors)
+
+        seen: set[int] = set()
+        for token_id in self._tokens_containing(driver):
+            for position in self.postings[token_id]:
+                if position in seen:
+                    continue
+                seen.add(position)
+                vector = self.vectors[position]
+                if all(w in vector for w in rest):
+                    return True
+        return False
+
+
+class SearchIndex:
+    """
+    In-memory инвертированный индекс по search_vector реестров.
+    Снимок перестраивается после обновления кэша и подменяется целиком.
+    """
+
+    def __init__(self):
+        self._snapshot: IndexSnapshot | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._snapshot is not None
+
+    def swap(self, snapshot: IndexSnapshot):
+        self._snapshot = snapshot
+        logger.info(f"Поисковый индекс обновлен ({len(snapshot)} записей).")
+
+    def find_first_match(self, query: str) -> bool:
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("Поисковый индекс еще не построен.")
+        return snapshot.find_first_match(split_search_query(query))
+
+
+search_index = SearchIndex()
@@ -1,22 +1,99 @@
 import asyncio
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import logging
+from typing import Iterable, Iterator
 
 from db.repository import UserRepo, CacheRepo
 from scraper_tool.scraper import UniversalScraper, CaptchaServiceError
+from scraper_tool.captcha import CapGuruClient
+from scraper_tool.driver_pool import DriverPool, DriverPoolTimeout
+from scraper_tool.http_client import HttpDownload, RegistryHttpClient
+from scraper_tool.metrics import registry_fetch_seconds, registry_refresh_total
+from scraper_tool.tracing import traced
+from scraper_tool.streaming import (
+    STREAMING_TARGETS,
+    iter_registry_rows,
+    iter_text_chunks,
+    stream_fingerprint,
+)
 from bot.config import settings
-from bot.normalizer import normalize_for_search
+from bot.metrics import search_seconds
+from bot.normalizer import normalize_batch
+from bot.rkn_dump import rkn_dump
+from bot.search_index import IndexSnapshot, search_index
 
 from db.engine import async_session_factory
 
-
 logger = logging.getLogger(__name__)
 
+UniversalScraper.set_parser_backend(settings.HTML_PARSER_BACKEND)
+
+driver_pool = DriverPool(
+    size=settings.DRIVER_POOL_SIZE,
+    max_uses=settings.DRIVER_POOL_MAX_USES,
+    max_memory_mb=settings.DRIVER_POOL_MAX_MEMORY_MB,
+    checkout_timeout=settings.DRIVER_POOL_CHECKOUT_TIMEOUT,
+)
+
+captcha_solver = CapGuruClient(
+    api_key=settings.CAPGURU_API_KEY,
+    base_url=settings.CAPGURU_BASE_URL,
+    max_wait=settings.CAPTCHA_MAX_WAIT,
+)
+
+registry_http_client = RegistryHttpClient(
+    timeout=settings.REGISTRY_HTTP_TIMEOUT,
+    spool_max_size=settings.REGISTRY_SPOOL_MAX_MB * 1024 * 1024,
+)
+
+
+class VerdictCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+url_verdict_cache_stats = VerdictCacheStats()
+
+
+class RegistryRefreshStats:
+    def __init__(self):
+        self.refreshed: dict[str, int] = {}
+        self.skipped: dict[str, int] = {}
+
+
+registry_refresh_stats = RegistryRefreshStats()
+
+_inflight_url_checks: dict[str, asyncio.Task] = {}
+
+_normalize_executor: ProcessPoolExecutor | None = None
+
+# Ключи реестров скрапера -> source_type в searchable_items
+_REGISTRY_SOURCE_TYPES = {"minjust": "minjust", "fedfsm": "fedsfm", "fsb": "fsb"}
+
+
+def _forget_url_check(url: str, task: asyncio.Task):
+    if _inflight_url_checks.get(url) is task:
+        del _inflight_url_checks[url]
+    # Забираем исключение, даже если все ожидающие были отменены
+    if not task.cancelled():
+        task.exception()
+
 
 class UserService:
     def __init__(self, user_repo: UserRepo):
         self.repo = user_repo
 
+    @traced()
     async def has_active_subscription(self, telegram_id: int) -> bool:
         user = await self.repo.get_or_create_user(telegram_id, None)
         return (
@@ -24,33 +101,24 @@ class UserService:
             and user.subscription_expires_at > datetime.now()
         )
 
+    @traced()
     async def can_check_url(self, telegram_id: int) -> bool:
         user = await self.repo.get_or_create_user(telegram_id, None)
         if not user.last_url_check_at:
             return True
         return datetime.now() >= user.last_url_check_at + timedelta(minutes=30)
 
+    @traced()
     async def update_user_url_check_time(self, telegram_id: int):
-        user = await self.repo.get_or_create_user(telegram_id, None)
-        user.last_url_check_at = datetime.now()
-        await self.repo.session.commit()
+        await self.repo.set_url_check_time(telegram_id, datetime.now())
 
+    @traced()
     async def grant_subscription(self, telegram_id: int):
-        user = await self.repo.get_or_create_user(telegram_id, None)
-        now = datetime.now()
-        start_date = (
-            user.subscription_expires_at
-            if user.subscription_expires_at and user.subscription_expires_at > now
-            else now
-        )
-        user.subscription_expires_at = start_date + timedelta(days=365)
-        await self.repo.session.commit()
+        await self.repo.extend_subscription(telegram_id, days=365)
 
+    @traced()
     async def revoke_subscription(self, telegram_id: int) -> bool:
-        user = await self.repo.get_user_by_telegram_id(telegram_id)
-        if user and user.subscription_expires_at:
-            user.subscription_expires_at = None
-            await self.repo.session.commit()
+        if await self.repo.clear_subscription(telegram_id):
             logger.info(f"Подписка для пользователя {telegram_id} была отозвана.")
             return True
         logger.warning(
@@ -58,48 +126,126 @@ class UserService:
         )
         return False
 
+    @traced()
     async def get_credits(self, telegram_id: int) -> int:
         user = await self.repo.get_or_create_user(telegram_id, None)
         return user.single_check_credits
 
+    @traced()
     async def add_credit(self, telegram_id: int):
         await self.repo.add_credits(telegram_id, 1)
 
-    async def spend_credit(self, telegram_id: int):
-        await self.repo.spend_credit(telegram_id)
+    @traced()
+    async def spend_credit(self, telegram_id: int) -> bool:
+        return await self.repo.spend_credit(telegram_id)
 
 
 class SearchService:
     def __init__(self, cache_repo: CacheRepo):
         self.repo = cache_repo
 
+    @traced()
     async def get_entity_verdict(self, query: str) -> str:
-        logger.info(f"Выполняю FTS поиск для вынесения вердикта по запросу: '{query}'")
-        found = await self.repo.find_first_match(query)
+        if search_index.is_ready:
+            logger.info(f"Выполняю поиск по индексу для вынесения вердикта: '{query}'")
+            with search_seconds.labels("index").time():
+                found = search_index.find_first_match(query)
+        else:
+            logger.info(f"Индекс не готов, выполняю поиск в БД по запросу: '{query}'")
+            with search_seconds.labels("db").time():
+                found = await self.repo.find_first_match(query)
 
         if found:
             return "❗️ **Организация признана нежелательной / экстремистской / террористической.**"
         else:
             return "✅ **Организация проверена.**"
 
+    @traced()
     async def check_url(self, url: str) -> str:
+        if rkn_dump.is_ready:
+            dump_match = rkn_dump.match(url, parents=settings.RKN_DUMP_MATCH_PARENTS)
+            if dump_match:
+                logger.info(
+                    f"URL '{url}' найден в локальной выгрузке РКН ({dump_match})."
+                )
+                return self._format_url_verdict(url, True)
+            if settings.RKN_DUMP_TRUST_MISSES:
+                return self._format_url_verdict(url, False)
+
+        cached = await self.repo.get_url_verdict(url)
+        if cached:
+            url_verdict_cache_stats.hits += 1
+            logger.info(
+                f"Вердикт по URL '{url}' взят из кэша (проверен {cached.checked_at})."
+            )
+            return self._format_url_verdict(url, cached.is_blocked)
+        url_verdict_cache_stats.misses += 1
+        # Проверка может идти минутами: соединение не держим на время ожидания
+        await self.repo.release()
+
+        # Одновременные проверки одного домена ждут один общий запуск скрапера
+        task = _inflight_url_checks.get(url)
+        if task is None:
+            task = asyncio.create_task(self._run_url_check(url))
+            _inflight_url_checks[url] = task
+            task.add_done_callback(lambda t: _forget_url_check(url, t))
+        else:
+            logger.info(f"Проверка URL '{url}' уже выполняется, ожидаю ее результат.")
+        # shield: отмена одного из ожидающих не отменяет общую проверку
+        return await asyncio.shield(task)
+
+    @classmethod
+    @traced()
+    async def _run_url_check(cls, url: str) -> str:
         logger.info(f"Запускаю скрапер для проверки URL по blocklist.rkn.gov.ru: {url}")
         try:
-            with UniversalScraper(capguru_api_key=settings.CAPGURU_API_KEY) as scraper:
-                blocklist_result = await asyncio.to_thread(
-                    scraper.check_rkn_blocklist, url
-                )
+            async with driver_pool.driver() as driver:
+                with UniversalScraper(
+                    capguru_api_key=settings.CAPGURU_API_KEY, driver=driver
+                ) as scraper:
+                    blocklist_result = await scraper.check_rkn_blocklist_async(
+                        url, captcha_solver
+                    )
 
         except CaptchaServiceError as e:
             logger.error(
                 f"Проверка URL '{url}' не удалась из-за сбоя сервиса капчи: {e}"
             )
             return "CAPTCHA_SERVICE_FAILED"
+        except DriverPoolTimeout as e:
+            logger.error(f"Проверка URL '{url}' не дождалась свободного драйвера: {e}")
+            return "CAPTCHA_SERVICE_FAILED"
+
+        if blocklist_result.get("ошибка"):
+            # Попытки исчерпаны или страница не распознана: вердикта нет, и в
+            # общий кэш он не пишется, проверка считается несостоявшейся
+            logger.error(
+                f"Проверка URL '{url}' не удалась: {blocklist_result.get('статус')}"
+            )
+            return "CAPTCHA_SERVICE_FAILED"
 
-        blocklist_found = (
-            "не найден" not in blocklist_result.get("статус", "не найден").lower()
+        status = blocklist_result.get("статус", "не найден")
+        blocklist_found = "не найден" not in status.lower()
+        ttl = timedelta(
+            hours=(
+                settings.URL_VERDICT_TTL_BLOCKED_HOURS
+                if blocklist_found
+                else settings.URL_VERDICT_TTL_ALLOWED_HOURS
+            )
         )
+        try:
+            # Своя сессия: общая проверка переживает запрос, который ее начал
+            async with async_session_factory() as session:
+                await CacheRepo(session).save_url_verdict(
+                    url, blocklist_found, status, ttl
+                )
+        except Exception as e:
+            logger.error(f"Не удалось сохранить вердикт по URL '{url}' в кэш: {e}")
+
+        return cls._format_url_verdict(url, blocklist_found)
 
+    @staticmethod
+    def _format_url_verdict(url: str, blocklist_found: bool) -> str:
         if blocklist_found:
             logger.info(f"Вердикт по URL '{url}': ОГРАНИЧЕН (найден в blocklist).")
             return "❗️ **Доступ к сайту ограничен по решению суда.**"
@@ -108,91 +254,307 @@ class SearchService:
             return "✅ **Ресурс разрешен.**"
 
 
-async def run_scrapers_and_update_cache():
-    logger.info(f"[{datetime.now()}] ЗАПУСК: Плановое обновление кэша реестров.")
-
-    all_data = {}
+async def refresh_search_index():
     try:
-        with UniversalScraper(capguru_api_key=settings.CAPGURU_API_KEY) as scraper:
-            all_data = await asyncio.to_thread(scraper.run_registry_scrapers)
-        logger.info("Скрапинг завершен, получены данные по всем реестрам.")
+        async with async_session_factory() as session:
+            rows = await CacheRepo(session).get_search_vectors()
+        snapshot = await asyncio.to_thread(IndexSnapshot, rows)
     except Exception as e:
-        logger.error(
-            f"Произошла КРИТИЧЕСКАЯ ошибка на этапе скрапинга, обновление прервано: {e}",
-            exc_info=True,
-        )
+        logger.error(f"Не удалось перестроить поисковый индекс: {e}", exc_info=True)
         return
+    search_index.swap(snapshot)
+
 
+async def refresh_rkn_dump():
+    if not settings.RKN_DUMP_PATH:
+        return
+    try:
+        await asyncio.to_thread(
+            rkn_dump.load, settings.RKN_DUMP_PATH, settings.RKN_DUMP_ENCODING
+        )
+    except Exception as e:
+        logger.error(f"Не удалось загрузить выгрузку РКН: {e}", exc_info=True)
+
+
+async def purge_expired_url_verdicts():
     async with async_session_factory() as session:
-        cache_repo = CacheRepo(session)
+        removed = await CacheRepo(session).purge_expired_url_verdicts()
+    logger.info(f"Удалено устаревших вердиктов по URL: {removed}.")
 
-        try:
-            minjust_data = all_data.get("minjust", [])
-            if minjust_data:
-                minjust_to_save = [
-                    {
-                        "source_type": "minjust",
-                        "name": item["name"],
-                        "details": item["details"],
-                        "search_vector": normalize_for_search(
-                            item["name"], item["details"]
-                        ),
-                    }
-                    for item in minjust_data
-                ]
-                await cache_repo.update_cache("minjust", minjust_to_save)
-                logger.info(
-                    f"Источник 'minjust' успешно обновлен ({len(minjust_to_save)} записей)."
-                )
-        except Exception as e:
-            logger.error(
-                f"Ошибка при обновлении источника 'minjust': {e}", exc_info=True
+
+def _fetch_registry_with_browser(name: str) -> str | None:
+    with UniversalScraper(capguru_api_key=settings.CAPGURU_API_KEY) as scraper:
+        return scraper.fetch_registry_page(name)
+
+
+async def _load_fingerprint(name: str):
+    async with async_session_factory() as session:
+        return await CacheRepo(session).get_fingerprint(name)
+
+
+def _report_skip(name: str, reason: str):
+    registry_refresh_stats.skipped[name] = (
+        registry_refresh_stats.skipped.get(name, 0) + 1
+    )
+    registry_refresh_total.labels(name, "skipped").inc()
+    logger.info(f"Реестр '{name}' не изменился ({reason}), обработка пропущена.")
+
+
+def _iter_downloaded_rows(name: str, page: HttpDownload) -> Iterator[dict]:
+    with page.file:
+        yield from iter_registry_rows(name, iter_text_chunks(page.file, page.encoding))
+
+
+async def _stream_registry(
+    name: str, stored
+) -> tuple[Iterator[dict], dict] | bool | None:
+    """
+    Потоковая загрузка по HTTP: страница пишется во временный файл, первый
+    проход по строкам считает отпечаток, второй (при изменениях) отдает
+    записи. None — страница не изменилась, False — по HTTP записи получить
+    не удалось.
+    """
+    target = UniversalScraper.registry_target(name)
+    with registry_fetch_seconds.labels(name, "http").time():
+        page = await registry_http_client.download(
+            target["url"],
+            etag=stored.etag if stored else None,
+            last_modified=stored.last_modified if stored else None,
+        )
+    if page is None:
+        return False
+    if page.not_modified:
+        _report_skip(name, "HTTP 304")
+        return None
+
+    try:
+        page_hash, row_count = await asyncio.to_thread(
+            stream_fingerprint, name, page.file, page.encoding
+        )
+    except BaseException:
+        page.file.close()
+        raise
+    logger.info(f"Реестр '{name}' загружен по HTTP, найдено записей: {row_count}.")
+    if not row_count:
+        page.file.close()
+        return False
+    if stored and stored.content_hash == page_hash:
+        page.file.close()
+        _report_skip(name, "совпал хеш контента")
+        return None
+
+    fingerprint = {
+        "content_hash": page_hash,
+        "etag": page.etag,
+        "last_modified": page.last_modified,
+    }
+    return _iter_downloaded_rows(name, page), fingerprint
+
+
+async def _scrape_registry(name: str) -> tuple[Iterable[dict], dict] | None:
+    """
+    Загружает и разбирает реестр. Возвращает записи и новый отпечаток
+    страницы либо None, если страница не изменилась с прошлого обновления.
+    """
+    target = UniversalScraper.registry_target(name)
+    stored = await _load_fingerprint(name)
+
+    if (
+        target["fetch"] in ("http", "http_fallback")
+        and settings.REGISTRY_STREAMING
+        and name in STREAMING_TARGETS
+    ):
+        result = await _stream_registry(name, stored)
+        if result is not False:
+            return result
+        if target["fetch"] == "http":
+            return [], {}
+        logger.warning(f"Реестр '{name}' не разобран по HTTP, переключаюсь на браузер.")
+    elif target["fetch"] in ("http", "http_fallback"):
+        with registry_fetch_seconds.labels(name, "http").time():
+            page = await registry_http_client.fetch(
+                target["url"],
+                etag=stored.etag if stored else None,
+                last_modified=stored.last_modified if stored else None,
+            )
+        if page and page.not_modified:
+            _report_skip(name, "HTTP 304")
+            return None
+        if page:
+            content_hash, items = await asyncio.to_thread(
+                UniversalScraper.parse_registry,
+                name,
+                page.text,
+                stored.content_hash if stored else None,
             )
+            if items is None:
+                _report_skip(name, "совпал хеш контента")
+                return None
+            fingerprint = {
+                "content_hash": content_hash,
+                "etag": page.etag,
+                "last_modified": page.last_modified,
+            }
+            logger.info(
+                f"Реестр '{name}' загружен по HTTP, найдено записей: {len(items)}."
+            )
+            if items:
+                return items, fingerprint
+        if target["fetch"] == "http":
+            return [], {}
+        logger.warning(f"Реестр '{name}' не разобран по HTTP, переключаюсь на браузер.")
 
-        try:
-            fedsfm_data = all_data.get("fedfsm", [])
-            if fedsfm_data:
-                fedsfm_to_save = [
-                    {
-                        "source_type": "fedsfm",
-                        "name": item["name"],
-                        "details": item["details"],
-                        "search_vector": normalize_for_search(
-                            item["name"], item["details"]
-                        ),
-                    }
-                    for item in fedsfm_data
-                ]
-                await cache_repo.update_cache("fedsfm", fedsfm_to_save)
-                logger.info(
-                    f"Источник 'fedsfm' успешно обновлен ({len(fedsfm_to_save)} записей)."
-                )
-        except Exception as e:
-            logger.error(
-                f"Ошибка при обновлении источника 'fedsfm': {e}", exc_info=True
+    html_content = await asyncio.to_thread(_fetch_registry_with_browser, name)
+    if not html_content:
+        return [], {}
+    content_hash, items = await asyncio.to_thread(
+        UniversalScraper.parse_registry,
+        name,
+        html_content,
+        stored.content_hash if stored else None,
+    )
+    if items is None:
+        _report_skip(name, "совпал хеш контента")
+        return None
+    return items, {"content_hash": content_hash}
+
+
+def _take_chunk(items: Iterator[dict]) -> list[dict]:
+    return list(itertools.islice(items, settings.REGISTRY_CHUNK_SIZE))
+
+
+def _get_normalize_executor() -> ProcessPoolExecutor | None:
+    """
+    Пул процессов нормализации; при NORMALIZE_WORKERS <= 1 — поток. Рабочие
+    процессы импортируют только bot.normalizer, если бот запущен через
+    `python -m bot` (см. bot/__main__.py).
+    """
+    global _normalize_executor
+    if _normalize_executor is None and settings.NORMALIZE_WORKERS > 1:
+        _normalize_executor = ProcessPoolExecutor(
+            max_workers=settings.NORMALIZE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _normalize_executor
+
+
+def shutdown_normalize_executor():
+    global _normalize_executor
+    if _normalize_executor is not None:
+        _normalize_executor.shutdown(wait=False, cancel_futures=True)
+        _normalize_executor = None
+
+
+async def _normalized_chunks(source_type: str, items: Iterable[dict]):
+    """
+    Разбор порциями в потоке и нормализация в пуле процессов. В работе
+    одновременно до NORMALIZE_WORKERS порций, порядок порций сохраняется.
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_normalize_executor()
+    items = iter(items)
+    in_flight = max(1, settings.NORMALIZE_WORKERS)
+    pending: deque[tuple[list[dict], asyncio.Future]] = deque()
+    exhausted = False
+
+    while True:
+        while not exhausted and len(pending) < in_flight:
+            raw = await asyncio.to_thread(_take_chunk, items)
+            if not raw:
+                exhausted = True
+                break
+            rows = [(item["name"], item["details"]) for item in raw]
+            pending.append((raw, loop.run_in_executor(executor, normalize_batch, rows)))
+        if not pending:
+            return
+
+        raw, vectors = pending.popleft()
+        yield [
+            {
+                "source_type": source_type,
+                "name": item["name"],
+                "details": item["details"],
+                "search_vector": vector,
+            }
+            for item, vector in zip(raw, await vectors)
+        ]
+
+
+async def _save_registry(name: str, items: Iterable[dict]) -> bool:
+    source_type = _REGISTRY_SOURCE_TYPES[name]
+    if not items:
+        return False
+    try:
+        async with async_session_factory() as session:
+            stats = await CacheRepo(session).update_cache(
+                source_type, _normalized_chunks(source_type, items)
             )
+        if stats.busy:
+            logger.info(
+                f"Источник '{source_type}' уже обновляет другой процесс, пропускаю."
+            )
+            return False
+        if not stats.activated:
+            logger.warning(
+                f"Поколение {stats.generation} источника '{source_type}' отклонено: "
+                f"слишком мало записей ({stats.row_count}), остается предыдущее."
+            )
+            return False
+        logger.info(
+            f"Источник '{source_type}' успешно обновлен до поколения "
+            f"{stats.generation} ({stats.row_count} записей): "
+            f"добавлено {stats.added}, удалено {stats.removed}, "
+            f"без изменений {stats.unchanged}."
+        )
+        return True
+    except Exception as e:
+        logger.error(
+            f"Ошибка при обновлении источника '{source_type}': {e}", exc_info=True
+        )
+        return False
+
 
+async def _refresh_registry(name: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
         try:
-            fsb_data = all_data.get("fsb", [])
-            if fsb_data:
-                fsb_to_save = [
-                    {
-                        "source_type": "fsb",
-                        "name": item["name"],
-                        "details": item["details"],
-                        "search_vector": normalize_for_search(
-                            item["name"], item["details"]
-                        ),
-                    }
-                    for item in fsb_data
-                ]
-                await cache_repo.update_cache("fsb", fsb_to_save)
-                logger.info(
-                    f"Источник 'fsb' успешно обновлен ({len(fsb_to_save)} записей)."
-                )
+            result = await _scrape_registry(name)
         except Exception as e:
-            logger.error(f"Ошибка при обновлении источника 'fsb': {e}", exc_info=True)
+            logger.error(f"Ошибка при скрапинге реестра '{name}': {e}", exc_info=True)
+            return
+    if result is None:
+        return
+    items, fingerprint = result
+    # Запись в кэш сразу по готовности, не дожидаясь остальных реестров
+    if not await _save_registry(name, items):
+        return
+    registry_refresh_stats.refreshed[name] = (
+        registry_refresh_stats.refreshed.get(name, 0) + 1
+    )
+    registry_refresh_total.labels(name, "refreshed").inc()
+    # Отпечаток сохраняется только после успешной записи, иначе сбойное
+    # обновление навсегда пропускалось бы как "без изменений"
+    try:
+        async with async_session_factory() as session:
+            await CacheRepo(session).save_fingerprint(name, **fingerprint)
+    except Exception as e:
+        logger.error(f"Не удалось сохранить отпечаток реестра '{name}': {e}")
+
+
+async def run_scrapers_and_update_cache():
+    logger.info(f"[{datetime.now()}] ЗАПУСК: Плановое обновление кэша реестров.")
+
+    concurrency = (
+        settings.REGISTRY_SCRAPE_CONCURRENCY if settings.REGISTRY_PARALLEL else 1
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    await asyncio.gather(
+        *(
+            _refresh_registry(name, semaphore)
+            for name in UniversalScraper.registry_names()
+        )
+    )
 
+    await refresh_search_index()
     logger.info(
         f"[{datetime.now()}] ЗАВЕРШЕНИЕ: Плановое обновление кэша реестров завершено."
     )
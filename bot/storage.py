@@ -0,0 +1,187 @@
+import copy
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from bot.config import settings
+from db.engine import async_session_factory
+from db.repository import FsmStateRepo
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("state", "data", "expires_at", "fresh_until")
+
+    def __init__(
+        self,
+        state: str | None,
+        data: dict,
+        expires_at: float,
+        fresh_until: float,
+    ):
+        self.state = state
+        self.data = data
+        self.expires_at = expires_at
+        self.fresh_until = fresh_until
+
+
+def _storage_key(key: StorageKey) -> str:
+    parts = (
+        key.bot_id,
+        key.chat_id,
+        key.user_id,
+        key.thread_id,
+        getattr(key, "business_connection_id", None),
+        key.destiny,
+    )
+    return ":".join("" if part is None else str(part) for part in parts)
+
+
+class TTLStorage(BaseStorage):
+    """
+    FSM-хранилище с TTL на ключ и ограничением числа ключей в памяти (LRU).
+    При заданной session_factory изменения сразу пишутся в MySQL, а ключ
+    читается из памяти, пока не прошло fresh_seconds с последней загрузки.
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta,
+        max_keys: int,
+        session_factory: async_sessionmaker | None = None,
+        fresh_seconds: float = 5,
+    ):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.session_factory = session_factory
+        self.fresh_seconds = fresh_seconds
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def _remember(self, name: str, entry: _Entry):
+        self._entries[name] = entry
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def _remember_empty(self, name: str, now: float):
+        fresh_until = now + self.fresh_seconds
+        self._remember(name, _Entry(None, {}, fresh_until, fresh_until))
+
+    async def _load(self, key: StorageKey) -> _Entry | None:
+        name = _storage_key(key)
+        now = time.monotonic()
+        entry = self._entries.get(name)
+        if entry is not None:
+            if entry.expires_at <= now:
+                del self._entries[name]
+                entry = None
+            elif self.session_factory is None or entry.fresh_until > now:
+                self._entries.move_to_end(name)
+                return entry if entry.state is not None or entry.data else None
+
+        if self.session_factory is None:
+            return None
+        try:
+            async with self.session_factory() as session:
+                row = await FsmStateRepo(session).get(name)
+        except Exception as e:
+            logger.error(f"Не удалось прочитать FSM-состояние '{name}' из БД: {e}")
+            return entry
+        if row is None:
+            # Отсутствие состояния тоже кэшируется: у большинства
+            # пользователей его нет, а читается оно на каждом обновлении
+            self._remember_empty(name, now)
+            return None
+        ttl_left = (row.expires_at - datetime.now()).total_seconds()
+        entry = _Entry(
+            row.state, row.data or {}, now + ttl_left, now + self.fresh_seconds
+        )
+        self._remember(name, entry)
+        return entry
+
+    async def _store(self, key: StorageKey, state: str | None, data: dict):
+        name = _storage_key(key)
+        # Пустое состояние не хранится: брошенные диалоги не копятся
+        if state is None and not data:
+            if self.session_factory is None:
+                self._entries.pop(name, None)
+            else:
+                self._remember_empty(name, time.monotonic())
+            await self._persist(name, None)
+            return
+
+        now = time.monotonic()
+        entry = _Entry(
+            state,
+            data,
+            now + self.ttl.total_seconds(),
+            now + self.fresh_seconds,
+        )
+        self._remember(name, entry)
+        await self._persist(name, entry)
+
+    async def _persist(self, name: str, entry: _Entry | None):
+        if self.session_factory is None:
+            return
+        try:
+            async with self.session_factory() as session:
+                repo = FsmStateRepo(session)
+                if entry is None:
+                    await repo.delete(name)
+                else:
+                    await repo.save(
+                        name, entry.state, entry.data, datetime.now() + self.ttl
+                    )
+        except Exception as e:
+            logger.error(f"Не удалось сохранить FSM-состояние '{name}' в БД: {e}")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._load(key)
+        state_name = state.state if isinstance(state, State) else state
+        await self._store(key, state_name, entry.data if entry else {})
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        entry = await self._load(key)
+        return entry.state if entry else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        entry = await self._load(key)
+        await self._store(key, entry.state if entry else None, copy.deepcopy(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        entry = await self._load(key)
+        return copy.deepcopy(entry.data) if entry else {}
+
+    async def close(self) -> None:
+        pass
+
+    async def purge_expired(self) -> int:
+        now = time.monotonic()
+        expired = [name for name, e in self._entries.items() if e.expires_at <= now]
+        for name in expired:
+            del self._entries[name]
+        removed = len(expired)
+        if self.session_factory is not None:
+            async with self.session_factory() as session:
+                removed += await FsmStateRepo(session).purge_expired()
+        return removed
+
+
+fsm_storage = TTLStorage(
+    ttl=timedelta(minutes=settings.FSM_STATE_TTL_MINUTES),
+    max_keys=settings.FSM_MEMORY_MAX_KEYS,
+    session_factory=async_session_factory if settings.FSM_PERSIST else None,
+    fresh_seconds=settings.FSM_MEMORY_FRESH_SECONDS,
+)
+
+
+async def purge_expired_fsm_states():
+    removed = await fsm_storage.purge_expired()
+    logger.info(f"Удалено устаревших FSM-состояний: {removed}.")
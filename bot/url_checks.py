@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from bot.config import settings
+from bot.services import SearchService, UserService
+from db.engine import async_session_factory
+from db.models import UrlCheckJob
+from db.repository import CacheRepo, UrlCheckJobRepo, UserRepo
+from scraper_tool.tracing import start_trace
+
+logger = logging.getLogger(__name__)
+
+CHECK_FAILED_TEXT = (
+    "❗️ **Проверка не удалась.**\n\n"
+    "Сервис временно перегружен или недоступен. Пожалуйста, попробуйте позже.\n\n"
+    "Ваш платеж **не был списан**."
+)
+
+
+class UrlCheckQueue:
+    """
+    Очередь проверок URL в таблице url_check_jobs и пул воркеров над ней.
+    Обработчик только ставит задачу; воркер выполняет проверку, списывает
+    проверку и редактирует сообщение ожидания результатом.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        poll_interval: float,
+        job_timeout: timedelta,
+        max_attempts: int,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.max_attempts = max_attempts
+
+        self._bot: Bot | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    async def submit(
+        self,
+        telegram_id: int,
+        chat_id: int,
+        message_id: int,
+        url: str,
+        charge_credit: bool,
+    ) -> int:
+        async with async_session_factory() as session:
+            job = await UrlCheckJobRepo(session).enqueue(
+                telegram_id, chat_id, message_id, url, charge_credit
+            )
+        logger.info(f"Проверка URL '{url}' поставлена в очередь (задача {job.id}).")
+        self._wakeup.set()
+        return job.id
+
+    async def start(self, bot: Bot):
+        self._bot = bot
+        await self.requeue_stale()
+        self._tasks = [
+            asyncio.create_task(self._worker(number)) for number in range(self.workers)
+        ]
+        logger.info(f"Запущено воркеров проверки URL: {self.workers}.")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def requeue_stale(self) -> int:
+        async with async_session_factory() as session:
+            requeued, failed = await UrlCheckJobRepo(session).requeue_stale(
+                self.job_timeout, self.max_attempts
+            )
+        if requeued:
+            logger.warning(f"Возвращено в очередь зависших проверок URL: {requeued}.")
+            self._wakeup.set()
+        for job in failed:
+            logger.error(
+                f"Проверка URL '{job.url}' (задача {job.id}) исчерпала попытки."
+            )
+            if self._bot is not None:
+                await self._notify(job, CHECK_FAILED_TEXT)
+        return requeued
+
+    async def _claim(self) -> UrlCheckJob | None:
+        async with async_session_factory() as session:
+            return await UrlCheckJobRepo(session).claim()
+
+    async def _worker(self, number: int):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Воркер {number}: не удалось взять задачу: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            lease = asyncio.create_task(self._keep_lease(job))
+            try:
+                with start_trace(
+                    "url_check", f"job-{job.id}", settings.TRACE_SLOW_SECONDS
+                ):
+                    await self._process(job)
+            except Exception as e:
+                logger.error(
+                    f"Воркер {number}: ошибка при обработке задачи {job.id}: {e}",
+                    exc_info=True,
+                )
+            finally:
+                lease.cancel()
+
+    async def _keep_lease(self, job: UrlCheckJob):
+        """Продлевает аренду, пока идет проверка: долгая проверка не зависшая."""
+        interval = self.job_timeout.total_seconds() / 5
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session_factory() as session:
+                    owned = await UrlCheckJobRepo(session).heartbeat(
+                        job.id, job.attempts
+                    )
+            except Exception as e:
+                logger.warning(f"Не удалось продлить аренду задачи {job.id}: {e}")
+                continue
+            if not owned:
+                logger.warning(f"Задача {job.id} больше не принадлежит этому воркеру.")
+                return
+
+    async def _process(self, job: UrlCheckJob):
+        try:
+            async with async_session_factory() as session:
+                verdict = await SearchService(CacheRepo(session)).check_url(job.url)
+        except Exception as e:
+            logger.error(f"Проверка URL '{job.url}' завершилась ошибкой: {e}")
+            verdict = "CAPTCHA_SERVICE_FAILED"
+
+        if verdict == "CAPTCHA_SERVICE_FAILED":
+            if await self._finish(job, "failed", verdict):
+                await self._notify(job, CHECK_FAILED_TEXT)
+            return
+
+        # Задача закрывается до списания: при падении между шагами проверка
+        # не будет повторена и списана дважды. Закрыть ее может только
+        # текущая попытка — перезапущенная чужая копия не спишет и не ответит
+        if not await self._finish(job, "done", verdict):
+            logger.warning(
+                f"Задача {job.id} уже закрыта или перезапущена, результат отброшен."
+            )
+            return
+        async with async_session_factory() as session:
+            user_service = UserService(UserRepo(session))
+            if job.charge_credit:
+                await user_service.spend_credit(job.telegram_id)
+            await user_service.update_user_url_check_time(job.telegram_id)
+        await self._notify(job, verdict, parse_mode="Markdown")
+
+    @staticmethod
+    async def _finish(job: UrlCheckJob, status: str, verdict: str) -> bool:
+        async with async_session_factory() as session:
+            return await UrlCheckJobRepo(session).finish(
+                job.id, job.attempts, status, verdict
+            )
+
+    async def _notify(self, job: UrlCheckJob, text: str, parse_mode: str | None = None):
+        try:
+            await self._bot.edit_message_text(
+                text,
+                chat_id=job.chat_id,
+                message_id=job.message_id,
+                parse_mode=parse_mode,
+            )
+        except TelegramAPIError as e:
+            logger.warning(
+                f"Не удалось отредактировать сообщение задачи {job.id}: {e}, "
+                "отправляю новое."
+            )
+            try:
+                await self._bot.send_message(job.chat_id, text, parse_mode=parse_mode)
+            except TelegramAPIError as e:
+                logger.error(f"Не удалось отправить результат задачи {job.id}: {e}")
+
+
+url_check_queue = UrlCheckQueue(
+    workers=settings.URL_CHECK_WORKERS,
+    poll_interval=settings.URL_CHECK_POLL_SECONDS,
+    job_timeout=timedelta(minutes=settings.URL_CHECK_JOB_TIMEOUT_MINUTES),
+    max_attempts=settings.URL_CHECK_MAX_ATTEMPTS,
+)
+
+
+async def requeue_stale_url_checks():
+    await url_check_queue.requeue_stale()
+
+
+async def purge_finished_url_checks():
+    async with async_session_factory() as session:
+        removed = await UrlCheckJobRepo(session).purge_finished(timedelta(days=7))
+    logger.info(f"Удалено завершенных задач проверки URL: {removed}.")
@@ -1,14 +1,9 @@
-from urllib.parse import urlparse
+from bot.domains import host_from_url
 
 
 def normalize_url_for_search(url: str) -> str:
-    if "://" not in url:
-        url = "http://" + url
-
-    parsed_uri = urlparse(url)
-    domain = parsed_uri.netloc
-
-    if domain.startswith("www."):
-        domain = domain[4:]
-
-    return domain
+    """
+    Хост из введенного адреса: без схемы, пути, порта, учетных данных и
+    www., в нижнем регистре и punycode — один ключ для всех написаний.
+    """
+    return host_from_url(url)
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from bot.config import settings
+from bot.search_index import search_index
+from scraper_tool.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """
+    Внешний middleware: не более limit обновлений обрабатываются
+    одновременно, остальные ждут. pending — все принятые, но не завершенные.
+    """
+
+    def __init__(self, limit: int, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @property
+    def overloaded(self) -> bool:
+        return self.pending >= self.max_pending
+
+    async def __call__(self, handler, event, data):
+        self.pending += 1
+        try:
+            with span("ConcurrencyLimiter.wait"):
+                await self._semaphore.acquire()
+            try:
+                return await handler(event, data)
+            finally:
+                self._semaphore.release()
+        finally:
+            self.pending -= 1
+
+
+class BackpressureRequestHandler(SimpleRequestHandler):
+    """Обработчик вебхука, отвечающий 503 при переполненной очереди."""
+
+    def __init__(self, *args, limiter: ConcurrencyLimiter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.limiter.overloaded:
+            logger.warning(
+                f"Очередь обновлений заполнена ({self.limiter.pending}), отвечаю 503."
+            )
+            return web.Response(status=503)
+        return await super().handle(request)
+
+
+def build_webhook_app(
+    dp: Dispatcher, bot: Bot, limiter: ConcurrencyLimiter
+) -> web.Application:
+    app = web.Application()
+    ready = {"value": False}
+
+    async def healthz(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    async def readyz(request: web.Request) -> web.Response:
+        if not ready["value"] or limiter.overloaded:
+            return web.Response(status=503, text="not ready")
+        if not search_index.is_ready:
+            return web.Response(status=503, text="search index is not ready")
+        return web.Response(text="ready")
+
+    async def on_startup(bot: Bot):
+        await bot.set_webhook(
+            f"{settings.WEBHOOK_BASE_URL.rstrip('/')}{settings.WEBHOOK_PATH}",
+            secret_token=settings.WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(100, settings.MAX_CONCURRENT_UPDATES),
+        )
+        ready["value"] = True
+
+    async def on_shutdown(bot: Bot):
+        ready["value"] = False
+
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+    # Ответ Telegram отдается сразу, обработка идет в фоне под лимитером
+    BackpressureRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        limiter=limiter,
+        handle_in_background=True,
+        secret_token=settings.WEBHOOK_SECRET,
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, limiter: ConcurrencyLimiter):
+    app = build_webhook_app(dp, bot, limiter)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBAPP_HOST, settings.WEBAPP_PORT)
+    await site.start()
+    logger.info(
+        f"Вебхук запущен на {settings.WEBAPP_HOST}:{settings.WEBAPP_PORT}"
+        f"{settings.WEBHOOK_PATH}."
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -1,9 +1,44 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from bot.config import settings
+from bot.metrics import db_pool_checked_out, db_pool_checkout_seconds
+
+
+class TimedPool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий ожидание свободного соединения."""
+
+    def _do_get(self):
+        with db_pool_checkout_seconds.time():
+            return super()._do_get()
+
 
 engine = create_async_engine(
     settings.DATABASE_URL_asyncpg,
     pool_recycle=3600,
+    poolclass=TimedPool,
 )
+db_pool_checked_out.function = engine.pool.checkedout
 
 async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+
+class LazySession:
+    """
+    Сессия на одно обновление: AsyncSession создается при первом обращении,
+    close() возвращает соединение в пул раньше конца обработчика. Следующее
+    обращение после close() откроет новую сессию.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker):
+        self._session_factory = session_factory
+        self._session: AsyncSession | None = None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    async def close(self):
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
@@ -1,5 +1,6 @@
 from sqlalchemy import (
     BigInteger,
+    Boolean,
     DateTime,
     Float,
     ForeignKey,
@@ -8,6 +9,7 @@ from sqlalchemy import (
     func,
     Index,
     Integer,
+    JSON,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -48,10 +50,96 @@ class SearchableItem(Base):
     details: Mapped[str] = mapped_column(Text, nullable=True)
 
     search_vector: Mapped[str] = mapped_column(Text)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+
+    # Запись видна в поколении g, если gen_from <= g и (gen_to пуст или gen_to > g)
+    gen_from: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    gen_to: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
 
     __table_args__ = (
         Index("ix_search_vector_fulltext", "search_vector", mysql_prefix="FULLTEXT"),
+        Index("ix_searchable_items_source_hash", "source_type", "content_hash"),
     )
 
     def __repr__(self):
         return f"<Item(id={self.id}, name='{self.name[:30]}...')>"
+
+
+class RegistryGeneration(Base):
+    __tablename__ = "registry_generations"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    source_type: Mapped[str] = mapped_column(String(50), index=True)
+    # building -> active -> retired; неудачная сборка -> failed
+    status: Mapped[str] = mapped_column(String(20), default="building", index=True)
+    row_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+    activated_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<RegistryGeneration(id={self.id}, source_type='{self.source_type}', "
+            f"status='{self.status}')>"
+        )
+
+
+class RegistryFingerprint(Base):
+    __tablename__ = "registry_fingerprints"
+
+    source: Mapped[str] = mapped_column(String(50), primary_key=True)
+    etag: Mapped[str] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[str] = mapped_column(String(64), nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(64))
+    updated_at: Mapped[DateTime] = mapped_column(DateTime)
+
+    def __repr__(self):
+        return f"<RegistryFingerprint(source='{self.source}')>"
+
+
+class UrlVerdict(Base):
+    __tablename__ = "url_verdicts"
+
+    domain: Mapped[str] = mapped_column(String(255), primary_key=True)
+    is_blocked: Mapped[bool] = mapped_column(Boolean)
+    status: Mapped[str] = mapped_column(Text, nullable=True)
+    checked_at: Mapped[DateTime] = mapped_column(DateTime)
+    expires_at: Mapped[DateTime] = mapped_column(DateTime, index=True)
+
+    def __repr__(self):
+        return f"<UrlVerdict(domain='{self.domain}', is_blocked={self.is_blocked})>"
+
+
+class FsmState(Base):
+    __tablename__ = "fsm_states"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSON, nullable=True)
+    expires_at: Mapped[DateTime] = mapped_column(DateTime, index=True)
+
+    def __repr__(self):
+        return f"<FsmState(key='{self.key}', state='{self.state}')>"
+
+
+class UrlCheckJob(Base):
+    __tablename__ = "url_check_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger)
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[int] = mapped_column(Integer)
+    url: Mapped[str] = mapped_column(String(255))
+    # Списывать ли разовую проверку: решается при постановке в очередь
+    charge_credit: Mapped[bool] = mapped_column(Boolean, default=False)
+    # queued / running / done / failed
+    status: Mapped[str] = mapped_column(String(16), default="queued", index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    verdict: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+    started_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+    # Аренда задачи: воркер продлевает ее, пока проверка идет
+    heartbeat_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<UrlCheckJob(id={self.id}, url='{self.url}', status='{self.status}')>"
@@ -1,8 +1,66 @@
+import hashlib
 import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterable
 
-from sqlalchemy import select, delete, func, and_
+from sqlalchemy import select, delete, update, func, and_, or_, text
+from sqlalchemy.dialects.mysql import insert, match
 from sqlalchemy.ext.asyncio import AsyncSession
-from db.models import Base, User, SearchableItem
+from sqlalchemy.orm.attributes import set_committed_value
+from db.models import (
+    Base,
+    User,
+    SearchableItem,
+    RegistryFingerprint,
+    RegistryGeneration,
+    UrlVerdict,
+    FsmState,
+    UrlCheckJob,
+)
+from bot.config import settings
+from bot.normalizer import SEARCH_VECTOR_VERSION, split_search_query
+from scraper_tool.tracing import traced
+
+_FULLTEXT_WORD_RE = re.compile(r"\w+")
+# Стоп-слова InnoDB по умолчанию (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD):
+# в индекс они не попадают, и "+слово*" с ними не находит ни одной строки
+_INNODB_STOPWORDS = frozenset(
+    {
+        "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en",
+        "for", "from", "how", "i", "in", "is", "it", "la", "of", "on", "or",
+        "that", "the", "this", "to", "was", "what", "when", "where", "who",
+        "will", "with", "und", "www",
+    }
+)  # fmt: skip
+
+_ID_CHUNK_SIZE = 1000
+
+
+def content_hash(item: dict) -> str:
+    # search_vector — функция от name и details; вместо него в хеш входит
+    # версия нормализатора, и порядок слов в векторе на хеш не влияет
+    payload = "\x1f".join(
+        (item["name"], item.get("details") or "", str(SEARCH_VECTOR_VERSION))
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheUpdateStats:
+    added: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    row_count: int = 0
+    generation: int | None = None
+    activated: bool = False
+    # Источник уже собирает другой процесс, эта сборка не запускалась
+    busy: bool = False
+
+
+def _chunks(ids: list[int]):
+    for start in range(0, len(ids), _ID_CHUNK_SIZE):
+        yield ids[start : start + _ID_CHUNK_SIZE]
 
 
 class BaseRepo:
@@ -14,16 +72,31 @@ class BaseRepo:
     async def get_by_id(self, obj_id: int):
         return await self.session.get(self.model, obj_id)
 
+    async def release(self):
+        """Завершает транзакцию и отдает соединение, объекты остаются доступны."""
+        await self.session.close()
+
 
 class UserRepo(BaseRepo):
     def __init__(self, session: AsyncSession):
         super().__init__(session, User)
+        # Репозиторий живет одно обновление (см. DIMiddleware): пользователь
+        # загружается один раз, изменения идут через тот же объект
+        self._users: dict[int, User] = {}
 
+    @traced()
     async def get_user_by_telegram_id(self, telegram_id: int) -> User | None:
+        user = self._users.get(telegram_id)
+        if user is not None:
+            return user
         query = select(User).where(User.telegram_id == telegram_id)
         result = await self.session.execute(query)
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+        if user is not None:
+            self._users[telegram_id] = user
+        return user
 
+    @traced()
     async def get_or_create_user(self, telegram_id: int, username: str | None) -> User:
         user = await self.get_user_by_telegram_id(telegram_id)
 
@@ -32,53 +105,647 @@ class UserRepo(BaseRepo):
             self.session.add(user)
             await self.session.commit()
             await self.session.refresh(user)
+            self._users[telegram_id] = user
         return user
 
-    async def add_credits(self, telegram_id: int, amount: int = 1):
-        user = await self.get_or_create_user(telegram_id, None)
-        user.single_check_credits += amount
+    def _sync_cached(self, telegram_id: int, **values):
+        """
+        Переносит результат UPDATE в закэшированный объект, не помечая его
+        измененным — иначе следующий flush перезаписал бы значение в БД.
+        """
+        user = self._users.get(telegram_id)
+        if user is None:
+            return
+        for key, value in values.items():
+            set_committed_value(user, key, value)
+
+    @traced()
+    async def add_credits(self, telegram_id: int, amount: int = 1) -> int:
+        stmt = (
+            insert(User)
+            .values(telegram_id=telegram_id, single_check_credits=amount)
+            .on_duplicate_key_update(
+                single_check_credits=User.single_check_credits + amount
+            )
+        )
+        result = await self.session.execute(stmt)
         await self.session.commit()
+        user = self._users.get(telegram_id)
+        if user is not None:
+            self._sync_cached(
+                telegram_id, single_check_credits=user.single_check_credits + amount
+            )
+        return result.rowcount
 
-    async def spend_credit(self, telegram_id: int):
-        user = await self.get_or_create_user(telegram_id, None)
-        if user.single_check_credits > 0:
-            user.single_check_credits -= 1
-            await self.session.commit()
-            return True
-        return False
+    @traced()
+    async def spend_credit(self, telegram_id: int) -> bool:
+        stmt = (
+            update(User)
+            .where(User.telegram_id == telegram_id, User.single_check_credits > 0)
+            .values(single_check_credits=User.single_check_credits - 1)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        if not result.rowcount:
+            return False
+        user = self._users.get(telegram_id)
+        if user is not None:
+            self._sync_cached(
+                telegram_id, single_check_credits=user.single_check_credits - 1
+            )
+        return True
+
+    @traced()
+    async def extend_subscription(self, telegram_id: int, days: int = 365) -> int:
+        """Продлевает подписку от текущего срока, если он не истек, иначе от now."""
+        now = datetime.now().replace(microsecond=0)
+        extended = func.date_add(
+            func.greatest(func.coalesce(User.subscription_expires_at, now), now),
+            text(f"INTERVAL {int(days)} DAY"),
+        )
+        stmt = (
+            insert(User)
+            .values(
+                telegram_id=telegram_id,
+                subscription_expires_at=now + timedelta(days=days),
+            )
+            .on_duplicate_key_update(subscription_expires_at=extended)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        user = self._users.get(telegram_id)
+        if user is not None:
+            current = user.subscription_expires_at
+            start_date = current if current and current > now else now
+            self._sync_cached(
+                telegram_id, subscription_expires_at=start_date + timedelta(days=days)
+            )
+        return result.rowcount
+
+    @traced()
+    async def clear_subscription(self, telegram_id: int) -> bool:
+        stmt = (
+            update(User)
+            .where(
+                User.telegram_id == telegram_id,
+                User.subscription_expires_at.is_not(None),
+            )
+            .values(subscription_expires_at=None)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        if not result.rowcount:
+            return False
+        self._sync_cached(telegram_id, subscription_expires_at=None)
+        return True
+
+    @traced()
+    async def set_url_check_time(self, telegram_id: int, checked_at: datetime) -> int:
+        stmt = (
+            insert(User)
+            .values(telegram_id=telegram_id, last_url_check_at=checked_at)
+            .on_duplicate_key_update(last_url_check_at=checked_at)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        self._sync_cached(telegram_id, last_url_check_at=checked_at)
+        return result.rowcount
 
 
 class CacheRepo:
+    _ft_min_token_size: int | None = None
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def update_cache(self, source_type: str, data: list[dict]):
+    async def release(self):
+        await self.session.close()
+
+    @staticmethod
+    def _visible(stmt):
+        """Ограничивает выборку записями активных поколений источников."""
+        return stmt.join(
+            RegistryGeneration,
+            and_(
+                RegistryGeneration.source_type == SearchableItem.source_type,
+                RegistryGeneration.status == "active",
+            ),
+        ).where(
+            SearchableItem.gen_from <= RegistryGeneration.id,
+            or_(
+                SearchableItem.gen_to.is_(None),
+                SearchableItem.gen_to > RegistryGeneration.id,
+            ),
+        )
+
+    async def _get_generations(
+        self, source_type: str, status: str
+    ) -> list[RegistryGeneration]:
+        result = await self.session.execute(
+            select(RegistryGeneration)
+            .where(
+                RegistryGeneration.source_type == source_type,
+                RegistryGeneration.status == status,
+            )
+            .order_by(RegistryGeneration.id)
+        )
+        return list(result.scalars().all())
+
+    async def _discard_generation(self, generation_id: int):
+        await self.session.execute(
+            delete(SearchableItem).where(SearchableItem.gen_from == generation_id)
+        )
+        await self.session.execute(
+            update(SearchableItem)
+            .where(SearchableItem.gen_to == generation_id)
+            .values(gen_to=None)
+        )
+        await self.session.execute(
+            update(RegistryGeneration)
+            .where(RegistryGeneration.id == generation_id)
+            .values(status="failed")
+        )
+        await self.session.commit()
+
+    @traced()
+    async def update_cache(
+        self, source_type: str, chunks: AsyncIterable[list[dict]]
+    ) -> CacheUpdateStats:
+        """
+        Собирает новое поколение источника по diff content_hash: новые записи
+        вставляются с gen_from = N, пропавшие помечаются gen_to = N. Читатели
+        видят только активное поколение, поэтому переключение на N происходит
+        одной транзакцией после записи и проверки числа строк.
+
+        Данные приходят порциями: в памяти держится одна порция и множество
+        уже увиденных хешей, а не весь реестр.
+
+        Сборки одного источника сериализуются именованной блокировкой MySQL
+        на отдельном соединении: сессия между коммитами меняет соединения,
+        а блокировка GET_LOCK принадлежит соединению. Если источник уже
+        собирает другая реплика, возвращается статистика с busy=True.
+        """
+        lock_name = f"registry:{source_type}"
+        async with self.session.bind.connect() as lock_connection:
+            acquired = await lock_connection.scalar(
+                text("SELECT GET_LOCK(:name, 0)"), {"name": lock_name}
+            )
+            if not acquired:
+                return CacheUpdateStats(busy=True)
+            try:
+                return await self._build_generation(source_type, chunks)
+            finally:
+                await lock_connection.execute(
+                    text("SELECT RELEASE_LOCK(:name)"), {"name": lock_name}
+                )
+
+    async def _build_generation(
+        self, source_type: str, chunks: AsyncIterable[list[dict]]
+    ) -> CacheUpdateStats:
+        # Под блокировкой сборка в статусе building может остаться только
+        # от упавшего процесса — она откатывается
+        for stale in await self._get_generations(source_type, "building"):
+            await self._discard_generation(stale.id)
+
+        active_generations = await self._get_generations(source_type, "active")
+        active = active_generations[-1] if active_generations else None
+
+        generation = RegistryGeneration(source_type=source_type, status="building")
+        self.session.add(generation)
+        await self.session.commit()
+        generation_id = generation.id
+
+        stats = CacheUpdateStats(generation=generation_id)
+        seen_hashes: set[str] = set()
+        try:
+            async for chunk in chunks:
+                stats.added += await self._insert_new_items(
+                    source_type, active, generation_id, chunk, seen_hashes
+                )
+            if active:
+                stats.unchanged, stats.removed = await self._retire_missing_items(
+                    source_type, active.id, generation_id, seen_hashes
+                )
+        except Exception:
+            await self.session.rollback()
+            await self._discard_generation(generation_id)
+            raise
+
+        stats.row_count = len(seen_hashes)
+        if (
+            active
+            and stats.row_count < active.row_count * settings.REGISTRY_MIN_ROW_RATIO
+        ):
+            await self._discard_generation(generation_id)
+            return stats
+
+        # Переключение читателей на новое поколение — одна транзакция
         await self.session.execute(
-            delete(SearchableItem).where(SearchableItem.source_type == source_type)
+            update(RegistryGeneration)
+            .where(
+                RegistryGeneration.source_type == source_type,
+                RegistryGeneration.status == "active",
+            )
+            .values(status="retired")
         )
+        result = await self.session.execute(
+            update(RegistryGeneration)
+            .where(
+                RegistryGeneration.id == generation_id,
+                RegistryGeneration.status == "building",
+            )
+            .values(
+                status="active",
+                row_count=stats.row_count,
+                activated_at=datetime.now(),
+            )
+        )
+        if result.rowcount != 1:
+            await self.session.rollback()
+            raise RuntimeError(
+                f"Поколение {generation_id} источника '{source_type}' "
+                "больше не в сборке, активация отменена."
+            )
+        await self.session.commit()
+        stats.activated = True
+
+        if active:
+            await self._collect_garbage(source_type, active.id)
+        return stats
+
+    async def _insert_new_items(
+        self,
+        source_type: str,
+        active: RegistryGeneration | None,
+        generation_id: int,
+        chunk: list[dict],
+        seen_hashes: set[str],
+    ) -> int:
+        """Вставляет записи порции, которых нет в активном поколении."""
+        incoming: dict[str, dict] = {}
+        for item in chunk:
+            item_hash = content_hash(item)
+            if item_hash not in seen_hashes:
+                incoming.setdefault(
+                    item_hash,
+                    {**item, "content_hash": item_hash, "gen_from": generation_id},
+                )
+        seen_hashes.update(incoming)
+        if not incoming:
+            return 0
+
+        if active:
+            result = await self.session.execute(
+                select(SearchableItem.content_hash).where(
+                    SearchableItem.source_type == source_type,
+                    SearchableItem.gen_from <= active.id,
+                    SearchableItem.gen_to.is_(None),
+                    SearchableItem.content_hash.in_(list(incoming)),
+                )
+            )
+            for item_hash in result.scalars():
+                incoming.pop(item_hash, None)
 
-        if data:
+        if incoming:
+            to_insert = list(incoming.values())
             await self.session.run_sync(
-                lambda session: session.bulk_insert_mappings(SearchableItem, data)
+                lambda session: session.bulk_insert_mappings(SearchableItem, to_insert)
             )
+        # Новые строки невидимы до активации поколения, коммит по порциям
+        # только сокращает транзакции
         await self.session.commit()
+        return len(incoming)
 
-    async def find_first_match(self, query: str) -> bool:
-        clean_query = (
-            re.sub(r'[\s,;*"\n«»]+', " ", query).strip().lower().replace("ё", "е")
+    async def _retire_missing_items(
+        self,
+        source_type: str,
+        active_id: int,
+        generation_id: int,
+        seen_hashes: set[str],
+    ) -> tuple[int, int]:
+        """
+        Помечает gen_to = N записи активного поколения, которых не оказалось
+        в новых данных (и дубликаты). Возвращает (оставлено, снято).
+        """
+        kept_hashes: set[str] = set()
+        to_retire: list[int] = []
+        result = await self.session.stream(
+            select(SearchableItem.id, SearchableItem.content_hash).where(
+                SearchableItem.source_type == source_type,
+                SearchableItem.gen_from <= active_id,
+                SearchableItem.gen_to.is_(None),
+            )
         )
-        if not clean_query:
+        async for item_id, item_hash in result:
+            if item_hash in seen_hashes and item_hash not in kept_hashes:
+                kept_hashes.add(item_hash)
+            else:
+                to_retire.append(item_id)
+
+        for chunk in _chunks(to_retire):
+            await self.session.execute(
+                update(SearchableItem)
+                .where(SearchableItem.id.in_(chunk))
+                .values(gen_to=generation_id)
+            )
+        await self.session.commit()
+        return len(kept_hashes), len(to_retire)
+
+    async def _collect_garbage(self, source_type: str, keep_from_generation: int):
+        """
+        Удаляет записи и поколения старше предыдущего активного: его строки
+        остаются до следующего обновления для читателей со старым снимком.
+        """
+        await self.session.execute(
+            delete(SearchableItem).where(
+                SearchableItem.source_type == source_type,
+                SearchableItem.gen_to <= keep_from_generation,
+            )
+        )
+        await self.session.execute(
+            delete(RegistryGeneration).where(
+                RegistryGeneration.source_type == source_type,
+                RegistryGeneration.status.in_(("retired", "failed")),
+                RegistryGeneration.id < keep_from_generation,
+            )
+        )
+        await self.session.commit()
+
+    @traced()
+    async def get_search_vectors(self) -> list[tuple[int, str]]:
+        result = await self.session.execute(
+            self._visible(select(SearchableItem.id, SearchableItem.search_vector))
+        )
+        return [tuple(row) for row in result.all()]
+
+    @traced()
+    async def find_first_match(self, query: str) -> bool:
+        query_words = split_search_query(query)
+        if not query_words:
             return False
 
-        query_words = clean_query.split()
+        if settings.SEARCH_STRATEGY == "fulltext":
+            conditions = await self._fulltext_conditions(query_words)
+        else:
+            conditions = self._like_conditions(query_words)
+
+        stmt = self._visible(select(SearchableItem.id)).where(and_(*conditions))
+        stmt = stmt.limit(1)
+
+        result = await self.session.execute(stmt)
+        found = result.scalar_one_or_none()
+
+        return found is not None
+
+    @traced()
+    async def get_fingerprint(self, source: str) -> RegistryFingerprint | None:
+        return await self.session.get(RegistryFingerprint, source)
+
+    @traced()
+    async def save_fingerprint(
+        self,
+        source: str,
+        content_hash: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        stmt = insert(RegistryFingerprint).values(
+            source=source,
+            etag=etag,
+            last_modified=last_modified,
+            content_hash=content_hash,
+            updated_at=datetime.now(),
+        )
+        stmt = stmt.on_duplicate_key_update(
+            etag=stmt.inserted.etag,
+            last_modified=stmt.inserted.last_modified,
+            content_hash=stmt.inserted.content_hash,
+            updated_at=stmt.inserted.updated_at,
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    @traced()
+    async def get_url_verdict(self, domain: str) -> UrlVerdict | None:
+        query = select(UrlVerdict).where(
+            UrlVerdict.domain == domain, UrlVerdict.expires_at > datetime.now()
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    @traced()
+    async def save_url_verdict(
+        self, domain: str, is_blocked: bool, status: str, ttl: timedelta
+    ):
+        now = datetime.now()
+        stmt = insert(UrlVerdict).values(
+            domain=domain,
+            is_blocked=is_blocked,
+            status=status,
+            checked_at=now,
+            expires_at=now + ttl,
+        )
+        stmt = stmt.on_duplicate_key_update(
+            is_blocked=stmt.inserted.is_blocked,
+            status=stmt.inserted.status,
+            checked_at=stmt.inserted.checked_at,
+            expires_at=stmt.inserted.expires_at,
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    @traced()
+    async def purge_expired_url_verdicts(self) -> int:
+        result = await self.session.execute(
+            delete(UrlVerdict).where(UrlVerdict.expires_at <= datetime.now())
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def _like_conditions(words: list[str]) -> list:
+        return [SearchableItem.search_vector.like(f"%{word}%") for word in words]
+
+    async def _get_ft_min_token_size(self) -> int:
+        if settings.FT_MIN_TOKEN_SIZE is not None:
+            return settings.FT_MIN_TOKEN_SIZE
+        if CacheRepo._ft_min_token_size is None:
+            result = await self.session.execute(
+                text("SELECT @@innodb_ft_min_token_size")
+            )
+            CacheRepo._ft_min_token_size = int(result.scalar_one())
+        return CacheRepo._ft_min_token_size
 
-        conditions = [
-            SearchableItem.search_vector.like(f"%{word}%") for word in query_words
+    async def _fulltext_conditions(self, words: list[str]) -> list:
+        min_token_size = await self._get_ft_min_token_size()
+
+        # Короткие слова, стоп-слова и слова с операторами/разделителями
+        # FULLTEXT не попадают в индекс корректно — для них остается LIKE.
+        fulltext_words = [
+            word
+            for word in words
+            if len(word) >= min_token_size
+            and word not in _INNODB_STOPWORDS
+            and _FULLTEXT_WORD_RE.fullmatch(word)
         ]
+        like_words = [word for word in words if word not in fulltext_words]
 
-        stmt = select(SearchableItem).where(and_(*conditions)).limit(1)
+        conditions = self._like_conditions(like_words)
+        if fulltext_words:
+            against = " ".join(f"+{word}*" for word in fulltext_words)
+            conditions.append(
+                match(SearchableItem.search_vector, against=against).in_boolean_mode()
+            )
+        return conditions
 
-        result = await self.session.execute(stmt)
-        match = result.scalar_one_or_none()
 
-        return match is not None
+class FsmStateRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, key: str) -> FsmState | None:
+        query = select(FsmState).where(
+            FsmState.key == key, FsmState.expires_at > datetime.now()
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def save(self, key: str, state: str | None, data: dict, expires_at: datetime):
+        stmt = insert(FsmState).values(
+            key=key, state=state, data=data, expires_at=expires_at
+        )
+        stmt = stmt.on_duplicate_key_update(
+            state=stmt.inserted.state,
+            data=stmt.inserted.data,
+            expires_at=stmt.inserted.expires_at,
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def delete(self, key: str):
+        await self.session.execute(delete(FsmState).where(FsmState.key == key))
+        await self.session.commit()
+
+    async def purge_expired(self) -> int:
+        result = await self.session.execute(
+            delete(FsmState).where(FsmState.expires_at <= datetime.now())
+        )
+        await self.session.commit()
+        return result.rowcount
+
+
+class UrlCheckJobRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue(
+        self,
+        telegram_id: int,
+        chat_id: int,
+        message_id: int,
+        url: str,
+        charge_credit: bool,
+    ) -> UrlCheckJob:
+        job = UrlCheckJob(
+            telegram_id=telegram_id,
+            chat_id=chat_id,
+            message_id=message_id,
+            url=url,
+            charge_credit=charge_credit,
+            status="queued",
+            attempts=0,
+        )
+        self.session.add(job)
+        await self.session.commit()
+        return job
+
+    async def claim(self) -> UrlCheckJob | None:
+        """
+        Забирает самую старую задачу из очереди. SKIP LOCKED позволяет
+        нескольким воркерам и репликам разбирать очередь без блокировок.
+        """
+        result = await self.session.execute(
+            select(UrlCheckJob)
+            .where(UrlCheckJob.status == "queued")
+            .order_by(UrlCheckJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+        if job is None:
+            await self.session.rollback()
+            return None
+        job.status = "running"
+        job.started_at = job.heartbeat_at = datetime.now()
+        job.attempts += 1
+        await self.session.commit()
+        return job
+
+    @staticmethod
+    def _owned(job_id: int, attempt: int):
+        # Попытка, у которой задачу уже забрали и перезапустили, ничего не меняет
+        return and_(
+            UrlCheckJob.id == job_id,
+            UrlCheckJob.status == "running",
+            UrlCheckJob.attempts == attempt,
+        )
+
+    async def heartbeat(self, job_id: int, attempt: int) -> bool:
+        result = await self.session.execute(
+            update(UrlCheckJob)
+            .where(self._owned(job_id, attempt))
+            .values(heartbeat_at=datetime.now())
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def finish(
+        self, job_id: int, attempt: int, status: str, verdict: str | None = None
+    ) -> bool:
+        """False — задачу уже закрыл или перезапустил кто-то другой."""
+        result = await self.session.execute(
+            update(UrlCheckJob)
+            .where(self._owned(job_id, attempt))
+            .values(status=status, verdict=verdict, finished_at=datetime.now())
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def requeue_stale(
+        self, timeout: timedelta, max_attempts: int
+    ) -> tuple[int, list[UrlCheckJob]]:
+        """
+        Возвращает в очередь задачи, чья аренда не продлевалась дольше
+        timeout (процесс упал посреди проверки); исчерпавшие попытки — в
+        failed. Возвращает число перезапущенных и список проваленных задач.
+        """
+        result = await self.session.execute(
+            select(UrlCheckJob)
+            .where(
+                UrlCheckJob.status == "running",
+                func.coalesce(UrlCheckJob.heartbeat_at, UrlCheckJob.started_at)
+                < datetime.now() - timeout,
+            )
+            .with_for_update(skip_locked=True)
+        )
+        requeued, failed = 0, []
+        for job in result.scalars():
+            if job.attempts >= max_attempts:
+                job.status = "failed"
+                job.finished_at = datetime.now()
+                failed.append(job)
+            else:
+                job.status = "queued"
+                requeued += 1
+        await self.session.commit()
+        return requeued, failed
+
+    async def purge_finished(self, older_than: timedelta) -> int:
+        result = await self.session.execute(
+            delete(UrlCheckJob).where(
+                UrlCheckJob.status.in_(("done", "failed")),
+                UrlCheckJob.finished_at < datetime.now() - older_than,
+            )
+        )
+        await self.session.commit()
+        return result.rowcount
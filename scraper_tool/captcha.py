@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+import aiohttp
+
+from scraper_tool.metrics import captcha_results, captcha_solve_seconds
+from scraper_tool.tracing import traced
+
+
+class CaptchaServiceError(Exception):
+    pass
+
+
+class CapGuruClient:
+    """
+    Асинхронный клиент cap.guru (in.php/res.php) с постоянной keep-alive
+    сессией. Интервалы опроса подстраиваются под наблюдаемое время решения.
+    """
+
+    _DEFAULT_FIRST_POLL = 5.0
+    _MIN_INTERVAL = 1.0
+    _MAX_INTERVAL = 10.0
+    _BACKOFF = 1.5
+    _MIN_HISTORY = 5
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.cap.guru",
+        request_timeout: float = 30,
+        max_wait: float = 110,
+        history_size: int = 50,
+    ):
+        self.api_key = api_key
+        self.in_url = f"{base_url.rstrip('/')}/in.php"
+        self.res_url = f"{base_url.rstrip('/')}/res.php"
+        self.request_timeout = request_timeout
+        self.max_wait = max_wait
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._solve_times: deque[float] = deque(maxlen=history_size)
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _quantile(self, q: float) -> float:
+        ordered = sorted(self._solve_times)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _poll_delays(self):
+        """
+        Задержки перед каждым опросом res.php. Пока статистики мало —
+        консервативные значения; затем первый опрос около p25 времени
+        решения, частые опросы до p90 и экспоненциальный backoff после.
+        """
+        if len(self._solve_times) < self._MIN_HISTORY:
+            first, interval, backoff_after = self._DEFAULT_FIRST_POLL, 2.0, 0.0
+        else:
+            p25, p75, p90 = (self._quantile(q) for q in (0.25, 0.75, 0.9))
+            first = max(self._MIN_INTERVAL, p25)
+            interval = min(self._MAX_INTERVAL, max(self._MIN_INTERVAL, (p75 - p25) / 4))
+            backoff_after = p90
+
+        elapsed = first
+        yield first
+        while True:
+            if elapsed >= backoff_after:
+                interval = min(self._MAX_INTERVAL, interval * self._BACKOFF)
+            elapsed += interval
+            yield interval
+
+    @traced()
+    async def submit(self, image_base64: str) -> str:
+        payload = {
+            "key": self.api_key,
+            "method": "base64",
+            "body": image_base64,
+            "json": 1,
+        }
+        try:
+            async with self._get_session().post(self.in_url, data=payload) as response:
+                response.raise_for_status()
+                response_data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.error("Сервис решения капчи недоступен (ошибка сети): %s", e)
+            raise CaptchaServiceError(
+                "Сервис решения капчи временно недоступен (ошибка сети)."
+            )
+        if response_data.get("status") != 1:
+            error_text = response_data.get("request", "Неизвестная ошибка API")
+            self.logger.error("API сервиса капчи вернуло ошибку: %s", error_text)
+            if "ERROR_ZERO_BALANCE" in error_text:
+                raise CaptchaServiceError(
+                    "Закончились средства на балансе сервиса решения капчи."
+                )
+            raise CaptchaServiceError(f"Ошибка сервиса капчи: {error_text}")
+        captcha_id = response_data.get("request")
+        self.logger.info("Капча успешно отправлена. ID задачи: %s", captcha_id)
+        return captcha_id
+
+    async def _fetch_result(self, captcha_id: str, vernet: int) -> dict | None:
+        params = {
+            "key": self.api_key,
+            "action": "get",
+            "id": captcha_id,
+            "json": 1,
+            "vernet": vernet,
+        }
+        try:
+            async with self._get_session().get(self.res_url, params=params) as response:
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.logger.warning("Ошибка сети при опросе решения капчи: %s", e)
+            return None
+
+    @traced()
+    async def solve(self, image_base64: str, vernet: int) -> str | None:
+        try:
+            solution = await self._solve(image_base64, vernet)
+        except CaptchaServiceError:
+            captcha_results.labels("error").inc()
+            raise
+        captcha_results.labels("solved" if solution else "timeout").inc()
+        return solution
+
+    async def _solve(self, image_base64: str, vernet: int) -> str | None:
+        submitted = time.monotonic()
+        captcha_id = await self.submit(image_base64)
+        started = time.monotonic()
+
+        for delay in self._poll_delays():
+            if time.monotonic() - started + delay > self.max_wait:
+                break
+            await asyncio.sleep(delay)
+
+            result_data = await self._fetch_result(captcha_id, vernet)
+            if result_data is None:
+                continue
+            if result_data.get("status") == 1:
+                solve_time = time.monotonic() - started
+                self._solve_times.append(solve_time)
+                captcha_solve_seconds.observe(time.monotonic() - submitted)
+                solution = result_data.get("request")
+                self.logger.info(
+                    "Капча решена за %.1f с. Ответ: %s", solve_time, solution
+                )
+                return solution
+            if result_data.get("request") == "CAPCHA_NOT_READY":
+                continue
+
+            error_text = result_data.get(
+                "request", "Неизвестная ошибка получения результата"
+            )
+            self.logger.error("Ошибка при получении решения капчи: %s", error_text)
+            if "ERROR_CAPTCHA_UNSOLVABLE" in error_text:
+                raise CaptchaServiceError(
+                    "Капча не может быть решена. Возможно, она слишком сложная."
+                )
+            raise CaptchaServiceError(f"Ошибка сервиса капчи: {error_text}")
+
+        self.logger.warning("Не удалось получить решение капчи за отведенное время.")
+        return None
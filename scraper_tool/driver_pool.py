@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from selenium import webdriver
+
+from scraper_tool.scraper import UniversalScraper
+from scraper_tool.tracing import traced
+
+
+class DriverPoolTimeout(Exception):
+    pass
+
+
+def _process_tree_rss_mb(pid: int) -> float | None:
+    """Суммарный RSS процесса и всех его потомков (Linux /proc)."""
+    total_kb = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            try:
+                with open(f"/proc/{current}/task/{current}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+            except OSError:
+                pass
+    except (OSError, ValueError):
+        return None
+    return total_kb / 1024
+
+
+class _PooledDriver:
+    __slots__ = ("driver", "uses", "created_at")
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """
+    Ограниченный пул заранее запущенных драйверов Chrome.
+    Драйвер выдается на одну проверку и возвращается в пул; при превышении
+    лимита использований или памяти он пересоздается.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_uses: int,
+        max_memory_mb: int,
+        checkout_timeout: float,
+        headless: bool = True,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.checkout_timeout = checkout_timeout
+        self.headless = headless
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle: list[_PooledDriver] = []
+        self._closed = False
+
+    async def start(self):
+        self.logger.info("Прогрев пула драйверов (%d шт.)...", self.size)
+        results = await asyncio.gather(
+            *(self._create() for _ in range(self.size)), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, _PooledDriver):
+                self._idle.append(result)
+            else:
+                self.logger.error("Не удалось прогреть драйвер: %s", result)
+        self.logger.info("Пул драйверов готов: %d из %d.", len(self._idle), self.size)
+
+    async def close(self):
+        self._closed = True
+        idle, self._idle = self._idle, []
+        await asyncio.gather(
+            *(self._quit(pooled) for pooled in idle), return_exceptions=True
+        )
+        self.logger.info("Пул драйверов закрыт.")
+
+    @asynccontextmanager
+    async def driver(self):
+        pooled = await self._acquire()
+        try:
+            yield pooled.driver
+        finally:
+            await self._release(pooled)
+
+    @traced()
+    async def _acquire(self) -> _PooledDriver:
+        if self._closed:
+            raise RuntimeError("Пул драйверов закрыт.")
+        try:
+            await asyncio.wait_for(
+                self._semaphore.acquire(), timeout=self.checkout_timeout
+            )
+        except asyncio.TimeoutError:
+            raise DriverPoolTimeout(
+                f"Нет свободного драйвера в течение {self.checkout_timeout} с."
+            )
+
+        try:
+            while self._idle:
+                pooled = self._idle.pop()
+                if await asyncio.to_thread(self._is_healthy, pooled.driver):
+                    pooled.uses += 1
+                    return pooled
+                self.logger.warning("Драйвер из пула не прошел проверку, пересоздаю.")
+                await self._quit(pooled)
+            pooled = await self._create()
+            pooled.uses += 1
+            return pooled
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def _release(self, pooled: _PooledDriver):
+        try:
+            if self._closed or self._should_recycle(pooled):
+                await self._quit(pooled)
+            elif await asyncio.to_thread(self._reset, pooled.driver):
+                self._idle.append(pooled)
+            else:
+                await self._quit(pooled)
+        finally:
+            self._semaphore.release()
+
+    def _should_recycle(self, pooled: _PooledDriver) -> bool:
+        if pooled.uses >= self.max_uses:
+            self.logger.info("Драйвер отработал %d проверок, пересоздаю.", pooled.uses)
+            return True
+        process = getattr(pooled.driver.service, "process", None)
+        rss_mb = _process_tree_rss_mb(process.pid) if process else None
+        if rss_mb is not None and rss_mb > self.max_memory_mb:
+            self.logger.info(
+                "Драйвер занимает %.0f МБ (лимит %d МБ), пересоздаю.",
+                rss_mb,
+                self.max_memory_mb,
+            )
+            return True
+        return False
+
+    async def _create(self) -> _PooledDriver:
+        driver = await asyncio.to_thread(UniversalScraper.create_driver, self.headless)
+        return _PooledDriver(driver)
+
+    async def _quit(self, pooled: _PooledDriver):
+        try:
+            await asyncio.to_thread(pooled.driver.quit)
+        except Exception as e:
+            self.logger.warning("Ошибка при закрытии драйвера: %s", e)
+
+    @staticmethod
+    def _is_healthy(driver: webdriver.Chrome) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver: webdriver.Chrome) -> bool:
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
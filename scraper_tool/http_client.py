@@ -0,0 +1,160 @@
+import asyncio
+import codecs
+import logging
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import IO
+
+import aiohttp
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+_SNIFF_SIZE = 4096
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+
+
+@dataclass
+class HttpPage:
+    text: str | None
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+
+
+@dataclass
+class HttpDownload:
+    """Тело ответа во временном файле (в памяти до spool_max_size, затем на диске)."""
+
+    file: IO[bytes] | None
+    encoding: str = "utf-8"
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+
+
+class RegistryHttpClient:
+    """
+    HTTP-клиент для статических страниц реестров: keep-alive сессия,
+    сжатие (aiohttp сам выставляет Accept-Encoding и распаковывает ответ)
+    и таймауты на запрос.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60,
+        connect_timeout: float = 15,
+        spool_max_size: int = 8 * 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.spool_max_size = spool_max_size
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(keepalive_timeout=60),
+                timeout=self.timeout,
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @staticmethod
+    def _conditional_headers(etag: str | None, last_modified: str | None) -> dict:
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    async def fetch(
+        self, url: str, etag: str | None = None, last_modified: str | None = None
+    ) -> HttpPage | None:
+        headers = self._conditional_headers(etag, last_modified)
+        try:
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 304:
+                    return HttpPage(
+                        text=None,
+                        etag=etag,
+                        last_modified=last_modified,
+                        not_modified=True,
+                    )
+                response.raise_for_status()
+                body = await response.read()
+                # Кодировка выбирается так же, как в download: aiohttp
+                # <meta charset> не учитывает
+                encoding = self._pick_encoding(response.charset, body[:_SNIFF_SIZE])
+                return HttpPage(
+                    text=body.decode(encoding, errors="replace"),
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.warning("Не удалось загрузить %s по HTTP: %s", url, e)
+            return None
+
+    async def download(
+        self, url: str, etag: str | None = None, last_modified: str | None = None
+    ) -> HttpDownload | None:
+        """
+        Потоковая загрузка: тело читается блоками во временный файл и не
+        собирается в одну строку. Кодировка берется из Content-Type или
+        <meta charset> в начале документа.
+        """
+        headers = self._conditional_headers(etag, last_modified)
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_max_size)
+        try:
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 304:
+                    spool.close()
+                    return HttpDownload(
+                        file=None,
+                        etag=etag,
+                        last_modified=last_modified,
+                        not_modified=True,
+                    )
+                response.raise_for_status()
+                head = b""
+                async for block in response.content.iter_chunked(self.chunk_size):
+                    if len(head) < _SNIFF_SIZE:
+                        head += block[: _SNIFF_SIZE - len(head)]
+                    spool.write(block)
+                encoding = self._pick_encoding(response.charset, head)
+                download = HttpDownload(
+                    file=spool,
+                    encoding=encoding,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            spool.close()
+            self.logger.warning("Не удалось загрузить %s по HTTP: %s", url, e)
+            return None
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return download
+
+    @staticmethod
+    def _pick_encoding(declared: str | None, head: bytes) -> str:
+        found = _META_CHARSET_RE.search(head)
+        sniffed = found.group(1).decode("ascii") if found else None
+        for encoding in (declared, sniffed):
+            if not encoding:
+                continue
+            try:
+                return codecs.lookup(encoding).name
+            except LookupError:
+                continue
+        return "utf-8"
@@ -0,0 +1,285 @@
+import hashlib
+import re
+
+from bs4 import BeautifulSoup
+
+_FEDFSM_NUMBER_RE = re.compile(r"^\d+\.\s*")
+_FEDFSM_PERSON_RE = re.compile(r"^\d+\.\s*(.*?),\s*([\d\.]+\s*г\.р\.)\s*(.*);?$")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Текст этих элементов BeautifulSoup.get_text не возвращает
+SKIPPED_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+class _SoupTree:
+    """Дерево BeautifulSoup с заданным билдером (html.parser или lxml)."""
+
+    def __init__(self, features: str):
+        self.features = features
+
+    def parse(self, html_content: str):
+        return BeautifulSoup(html_content, self.features)
+
+    @staticmethod
+    def first(node, selector: str):
+        return node.select_one(selector)
+
+    @staticmethod
+    def all(node, selector: str) -> list:
+        return node.select(selector)
+
+    @staticmethod
+    def text(node, separator: str = "", strip: bool = False) -> str:
+        return node.get_text(separator=separator, strip=strip)
+
+    @staticmethod
+    def html(node) -> str:
+        return str(node)
+
+
+class _SelectolaxTree:
+    """Дерево selectolax (lexbor) с CSS-селекторами."""
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser_cls = LexborHTMLParser
+
+    def parse(self, html_content: str):
+        return self._parser_cls(html_content)
+
+    @staticmethod
+    def first(node, selector: str):
+        return node.css_first(selector)
+
+    @staticmethod
+    def all(node, selector: str) -> list:
+        return node.css(selector)
+
+    @staticmethod
+    def html(node) -> str:
+        return node.html
+
+    @classmethod
+    def _text_nodes(cls, node):
+        for child in node.iter(include_text=True):
+            if child.tag == "-text":
+                yield child.text_content
+            elif child.tag not in SKIPPED_TEXT_TAGS and not child.tag.startswith("-"):
+                yield from cls._text_nodes(child)
+
+    @classmethod
+    def text(cls, node, separator: str = "", strip: bool = False) -> str:
+        # Повторяет семантику BeautifulSoup.get_text: текстовые узлы потомков
+        # без script/style и т.п., при strip каждый узел обрезается, а пустые
+        # отбрасываются
+        parts = []
+        for part in cls._text_nodes(node):
+            if strip:
+                part = part.strip()
+                if not part:
+                    continue
+            parts.append(part)
+        return separator.join(parts)
+
+
+class HtmlParserBackend:
+    """
+    Парсеры страниц реестров поверх выбранного HTML-бэкенда. Логика разбора
+    общая для всех бэкендов, отличаются только построение дерева, поиск
+    по CSS-селекторам и извлечение текста.
+    """
+
+    def __init__(self, name: str, tree):
+        self.name = name
+        self.tree = tree
+
+    def parse_registry_page(
+        self,
+        registry: str,
+        html_content: str,
+        sections: list[str],
+        known_hash: str | None = None,
+    ) -> tuple[str, list[dict] | None]:
+        """
+        Отпечаток разделов страницы (CSS-селекторы sections) и записи реестра
+        по одному дереву. Записи не разбираются (None), если отпечаток совпал
+        с known_hash.
+        """
+        root = self.tree.parse(html_content)
+        content_hash = self.fingerprint(root, sections)
+        if content_hash == known_hash:
+            return content_hash, None
+        return content_hash, getattr(self, f"_{registry}_rows")(root)
+
+    def fingerprint(self, root, sections: list[str]) -> str:
+        tree = self.tree
+        digest = hashlib.sha256()
+        for selector in sections:
+            section = tree.first(root, selector)
+            html = tree.html(section) if section is not None else "None"
+            digest.update(html.encode("utf-8"))
+        return digest.hexdigest()
+
+    def parse_minjust(self, html_content: str) -> list[dict]:
+        return self._minjust_rows(self.tree.parse(html_content))
+
+    def parse_fedfsm(self, html_content: str) -> list[dict]:
+        return self._fedfsm_rows(self.tree.parse(html_content))
+
+    def parse_fsb(self, html_content: str) -> list[dict]:
+        return self._fsb_rows(self.tree.parse(html_content))
+
+    def _minjust_rows(self, root) -> list[dict]:
+        tree = self.tree
+        table = tree.first(root, "table")
+        if not table:
+            return []
+
+        data = []
+        for row in tree.all(table, "tr"):
+            cells = tree.all(row, "td")
+
+            if len(cells) < 4:
+                continue
+
+            header_cells = tree.all(row, "th")
+            if len(header_cells) > 3 and "Полное и сокращенное" in tree.text(
+                header_cells[3]
+            ):
+                continue
+
+            name = tree.text(cells[3], strip=True)
+
+            if not name:
+                continue
+
+            number, order, decision = (
+                tree.text(cell, strip=True) for cell in cells[:3]
+            )
+            details_parts = []
+            if number:
+                details_parts.append(f"Номер в перечне: {number}")
+            if order:
+                details_parts.append(f"Распоряжение Минюста: {order}")
+            if decision:
+                details_parts.append(f"Решение Генпрокуратуры: {decision}")
+
+            details_str = " | ".join(details_parts)
+            data.append({"name": name, "details": details_str})
+
+        return data
+
+    def _fedfsm_rows(self, root) -> list[dict]:
+        tree = self.tree
+        all_entries = []
+        org_container = tree.first(root, "div#russianUL")
+        if org_container:
+            for item in tree.all(org_container, "li"):
+                all_entries.append(
+                    {
+                        "name": _FEDFSM_NUMBER_RE.sub(
+                            "", tree.text(item, strip=True), count=1
+                        ),
+                        "details": "Тип: Организация",
+                    }
+                )
+        ind_container = tree.first(root, "div#russianFL")
+        if ind_container:
+            for item in tree.all(ind_container, "li"):
+                text = tree.text(item, strip=True).replace("\n", " ")
+                match = _FEDFSM_PERSON_RE.search(text)
+                if match:
+                    all_entries.append(
+                        {
+                            "name": match.group(1).strip(),
+                            "details": f"Тип: Физ. лицо | ДР: {match.group(2).strip()} | Место рождения: {match.group(3).strip(';')}",
+                        }
+                    )
+        return all_entries
+
+    def _fsb_rows(self, root) -> list[dict]:
+        tree = self.tree
+        table = tree.first(root, "table.table")
+        if not table:
+            return []
+        organizations_list = []
+        # Строки берутся прямо из таблицы: lexbor достраивает <tbody>, а
+        # html.parser и lxml — нет, и выборка через tbody разошлась бы
+        for row in tree.all(table, "tr")[1:]:
+            cells = tree.all(row, "td")
+            if len(cells) == 3:
+                name = tree.text(cells[1], separator=" ", strip=True)
+                court_info = " ".join(
+                    tree.text(div, strip=True) for div in tree.all(cells[2], "div")
+                )
+                organizations_list.append(
+                    {
+                        "name": name,
+                        "details": _WHITESPACE_RE.sub(" ", court_info).strip(),
+                    }
+                )
+        return organizations_list
+
+    def parse_rkn_blocklist_page(self, html_content: str) -> dict | None:
+        """
+        Разбирает страницу результата blocklist.rkn.gov.ru.
+        Возвращает None, если сайт отклонил защитный код, и словарь с ключом
+        "ошибка", если страница не похожа на страницу результата.
+        """
+        tree = self.tree
+        root = tree.parse(html_content)
+
+        error_div = tree.first(root, "div#error")
+        if (
+            error_div
+            and "неверно указан защитный код"
+            in tree.text(error_div, strip=True).lower()
+        ):
+            return None
+
+        search_res = tree.first(root, "p#searchresurs")
+        if not search_res:
+            # Не страница результата (смена верстки, лимит запросов, недогруженная
+            # страница): ни "найден", ни "не найден" из нее не следует
+            return {
+                "статус": "Страница результата не распознана (отсутствует 'searchresurs').",
+                "ошибка": True,
+            }
+        summary = tree.text(search_res, strip=True)
+        restrictions = []
+        table = tree.first(root, "table#tbl_search")
+        if table:
+            for row in tree.all(table, "tr"):
+                cells = [
+                    tree.text(td, separator="\n", strip=True)
+                    for td in tree.all(row, "td")
+                ]
+                if len(cells) == 3:
+                    restrictions.append(
+                        {
+                            "Тип ограничения": cells[0],
+                            "Статья": cells[1],
+                            "Основание": cells[2],
+                        }
+                    )
+        if not restrictions:
+            return {"статус": f"{summary}. Ограничений не найдено."}
+        return {"статус": summary, "ограничения": restrictions}
+
+
+_BACKENDS = {
+    "html.parser": lambda: _SoupTree("html.parser"),
+    "lxml": lambda: _SoupTree("lxml"),
+    "selectolax": _SelectolaxTree,
+}
+_instances: dict[str, HtmlParserBackend] = {}
+
+
+def get_parser_backend(name: str = "html.parser") -> HtmlParserBackend:
+    if name not in _BACKENDS:
+        raise ValueError(
+            f"Неизвестный HTML-бэкенд '{name}', доступны: {', '.join(_BACKENDS)}"
+        )
+    if name not in _instances:
+        _instances[name] = HtmlParserBackend(name, _BACKENDS[name]())
+    return _instances[name]
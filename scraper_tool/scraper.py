@@ -1,8 +1,6 @@
-import re
 import time
+import asyncio
 import logging
-import requests
-from bs4 import BeautifulSoup
 
 from selenium import webdriver
 from selenium.webdriver.common.action_chains import ActionChains
@@ -12,46 +10,63 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+from scraper_tool.captcha import CapGuruClient, CaptchaServiceError
+from scraper_tool.http_client import USER_AGENT
+from scraper_tool.metrics import (
+    blocklist_check_attempts,
+    captcha_results,
+    registry_fetch_seconds,
+    registry_parse_seconds,
+    registry_rows,
 )
-
-
-class CaptchaServiceError(Exception):
-    pass
+from scraper_tool.parsers import get_parser_backend
+from scraper_tool.tracing import traced
 
 
 class UniversalScraper:
-    _CAPGURU_IN_URL = "https://api.cap.guru/in.php"
-    _CAPGURU_RES_URL = "https://api.cap.guru/res.php"
+    parser_backend = get_parser_backend("html.parser")
 
+    # fetch: "http" — только HTTP, "browser" — только Selenium,
+    # "http_fallback" — HTTP, а при пустом результате Selenium.
+    # sections — CSS-селекторы элементов, по которым считается отпечаток контента
     _REGISTRY_TARGETS = {
         "minjust": {
             "url": "https://minjust.gov.ru/ru/documents/7756/",
             "wait_for": (By.ID, "documentcontent"),
-            "parser_method": "_parse_minjust",
+            "fetch": "http_fallback",
+            "sections": ["table"],
         },
         "fedfsm": {
             "url": "https://fedsfm.ru/documents/terrorists-catalog-portal-act",
             "wait_for": (By.ID, "russianFL"),
-            "parser_method": "_parse_fedfsm",
+            "fetch": "browser",
+            "sections": ["div#russianUL", "div#russianFL"],
         },
         "fsb": {
             "url": "http://www.fsb.ru/fsb/npd/terror.htm",
             "wait_for": (By.CLASS_NAME, "table"),
-            "parser_method": "_parse_fsb",
+            "fetch": "http_fallback",
+            "sections": ["table.table"],
         },
     }
 
-    def __init__(self, capguru_api_key: str, headless: bool = True):
+    def __init__(
+        self,
+        capguru_api_key: str,
+        headless: bool = True,
+        driver: webdriver.Chrome | None = None,
+    ):
         self.capguru_api_key = capguru_api_key
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.driver = self._initialize_driver(headless)
+        # Внешний драйвер (например, из DriverPool) скрапер не закрывает
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else self.create_driver(headless)
 
-    def _initialize_driver(self, headless: bool):
-        self.logger.info("Инициализация драйвера WebDriver (Chrome)...")
+    @classmethod
+    @traced()
+    def create_driver(cls, headless: bool = True) -> webdriver.Chrome:
+        logger = logging.getLogger(cls.__name__)
+        logger.info("Инициализация драйвера WebDriver (Chrome)...")
         options = Options()
         if headless:
             options.add_argument("--headless")
@@ -60,18 +75,16 @@ class UniversalScraper:
         options.add_argument("--disable-gpu")
         options.add_argument("--window-size=1920,1080")
         options.add_argument("--disable-extensions")
-        options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-        )
+        options.add_argument(f"user-agent={USER_AGENT}")
         try:
             service = ChromeService()
             driver = webdriver.Chrome(service=service, options=options)
             driver.set_page_load_timeout(40)
             driver.implicitly_wait(10)
-            self.logger.info("Драйвер Chrome успешно инициализирован.")
+            logger.info("Драйвер Chrome успешно инициализирован.")
             return driver
         except Exception as e:
-            self.logger.error(
+            logger.error(
                 "Ошибка при инициализации драйвера Chrome: %s", e, exc_info=True
             )
             raise
@@ -82,202 +95,33 @@ class UniversalScraper:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    @staticmethod
-    def _parse_minjust(html_content: str) -> list[dict]:
-        soup = BeautifulSoup(html_content, "html.parser")
-        table = soup.find("table")
-        if not table:
-            return []
-
-        data = []
-        for row in table.find_all("tr"):
-            cells = row.find_all("td")
-
-            if len(cells) < 4:
-                continue
+    @classmethod
+    def set_parser_backend(cls, name: str):
+        cls.parser_backend = get_parser_backend(name)
 
-            header_cells = row.find_all("th")
-            if (
-                len(header_cells) > 3
-                and "Полное и сокращенное" in header_cells[3].get_text()
-            ):
-                continue
-
-            name = cells[3].get_text(strip=True)
-
-            if not name:
-                continue
-
-            details_parts = []
-            if cells[0].get_text(strip=True):
-                details_parts.append(
-                    f"Номер в перечне: {cells[0].get_text(strip=True)}"
-                )
-            if cells[1].get_text(strip=True):
-                details_parts.append(
-                    f"Распоряжение Минюста: {cells[1].get_text(strip=True)}"
-                )
-            if cells[2].get_text(strip=True):
-                details_parts.append(
-                    f"Решение Генпрокуратуры: {cells[2].get_text(strip=True)}"
-                )
+    @classmethod
+    def _parse_rkn_blocklist_result(cls, html_content: str) -> dict | None:
+        return cls.parser_backend.parse_rkn_blocklist_page(html_content)
 
-            details_str = " | ".join(details_parts)
-            data.append({"name": name, "details": details_str})
-
-        return data
-
-    @staticmethod
-    def _parse_fedfsm(html_content: str) -> list[dict]:
-        all_entries = []
-        soup = BeautifulSoup(html_content, "html.parser")
-        org_container = soup.find("div", id="russianUL")
-        if org_container:
-            for item in org_container.find_all("li"):
-                all_entries.append(
-                    {
-                        "name": re.sub(r"^\d+\.\s*", "", item.get_text(strip=True)),
-                        "details": "Тип: Организация",
-                    }
-                )
-        ind_container = soup.find("div", id="russianFL")
-        if ind_container:
-            pattern = re.compile(r"^\d+\.\s*(.*?),\s*([\d\.]+\s*г\.р\.)\s*(.*);?$")
-            for item in ind_container.find_all("li"):
-                text = item.get_text(strip=True).replace("\n", " ")
-                match = pattern.search(text)
-                if match:
-                    all_entries.append(
-                        {
-                            "name": match.group(1).strip(),
-                            "details": f"Тип: Физ. лицо | ДР: {match.group(2).strip()} | Место рождения: {match.group(3).strip(';')}",
-                        }
-                    )
-        return all_entries
-
-    @staticmethod
-    def _parse_fsb(html_content: str) -> list[dict]:
-        soup = BeautifulSoup(html_content, "html.parser")
-        table = soup.find("table", class_="table")
-        if not table:
-            return []
-        organizations_list = []
-        for row in table.find("tbody").find_all("tr")[1:]:
-            cells = row.find_all("td")
-            if len(cells) == 3:
-                name = cells[1].get_text(separator=" ", strip=True)
-                court_info = " ".join(
-                    div.get_text(strip=True) for div in cells[2].find_all("div")
-                )
-                organizations_list.append(
-                    {"name": name, "details": re.sub(r"\s+", " ", court_info).strip()}
-                )
-        return organizations_list
-
-    @staticmethod
-    def _parse_rkn_blocklist_result(soup: BeautifulSoup) -> dict:
-        search_res = soup.find("p", id="searchresurs")
-        if not search_res:
-            return {
-                "статус": "Ресурс не найден в реестре (отсутствует 'searchresurs')."
-            }
-        summary = search_res.get_text(strip=True)
-        restrictions = []
-        table = soup.find("table", id="tbl_search")
-        if table:
-            for row in table.find("tbody").find_all("tr"):
-                cells = [
-                    td.get_text(separator="\n", strip=True) for td in row.find_all("td")
-                ]
-                if len(cells) == 3:
-                    restrictions.append(
-                        {
-                            "Тип ограничения": cells[0],
-                            "Статья": cells[1],
-                            "Основание": cells[2],
-                        }
-                    )
-        if not restrictions:
-            return {"статус": f"{summary}. Ограничений не найдено."}
-        return {"статус": summary, "ограничения": restrictions}
+    def _get_captcha_image(self) -> str | None:
+        wait = WebDriverWait(self.driver, 20)
+        try:
+            captcha_image_element = wait.until(
+                EC.visibility_of_element_located((By.ID, "captcha_image"))
+            )
+        except Exception:
+            self.logger.warning("Не удалось найти элемент 'captcha_image' на странице.")
+            return None
+        return captcha_image_element.screenshot_as_base64
 
-    def _solve_captcha(self, vernet_param: int):
+    @traced()
+    async def _solve_captcha(self, solver: CapGuruClient, vernet_param: int):
         try:
-            wait = WebDriverWait(self.driver, 20)
-            try:
-                captcha_image_element = wait.until(
-                    EC.visibility_of_element_located((By.ID, "captcha_image"))
-                )
-            except Exception:
-                self.logger.warning(
-                    "Не удалось найти элемент 'captcha_image' на странице."
-                )
+            image_base64 = await asyncio.to_thread(self._get_captcha_image)
+            if not image_base64:
                 return None
-            image_base64 = captcha_image_element.screenshot_as_base64
             self.logger.info("Изображение капчи получено. Отправка в сервис решения...")
-            try:
-                payload = {
-                    "key": self.capguru_api_key,
-                    "method": "base64",
-                    "body": image_base64,
-                    "json": 1,
-                }
-                response = requests.post(self._CAPGURU_IN_URL, data=payload, timeout=30)
-                response.raise_for_status()
-                response_data = response.json()
-            except requests.exceptions.RequestException as e:
-                self.logger.error(
-                    "Сервис решения капчи недоступен (ошибка сети): %s", e
-                )
-                raise CaptchaServiceError(
-                    "Сервис решения капчи временно недоступен (ошибка сети)."
-                )
-            if response_data.get("status") != 1:
-                error_text = response_data.get("request", "Неизвестная ошибка API")
-                self.logger.error("API сервиса капчи вернуло ошибку: %s", error_text)
-                if "ERROR_ZERO_BALANCE" in error_text:
-                    raise CaptchaServiceError(
-                        "Закончились средства на балансе сервиса решения капчи."
-                    )
-                raise CaptchaServiceError(f"Ошибка сервиса капчи: {error_text}")
-            captcha_id = response_data.get("request")
-            self.logger.info("Капча успешно отправлена. ID задачи: %s", captcha_id)
-            time.sleep(10)
-            for _ in range(20):
-                params = {
-                    "key": self.capguru_api_key,
-                    "action": "get",
-                    "id": captcha_id,
-                    "json": 1,
-                    "vernet": vernet_param,
-                }
-                result_response = requests.get(
-                    self._CAPGURU_RES_URL, params=params, timeout=30
-                )
-                result_data = result_response.json()
-                if result_data.get("status") == 1:
-                    solution = result_data.get("request")
-                    self.logger.info("Капча решена. Ответ: %s", solution)
-                    return solution
-                elif result_data.get("request") == "CAPCHA_NOT_READY":
-                    self.logger.info("Капча еще не готова, ждем 5 секунд...")
-                    time.sleep(5)
-                else:
-                    error_text = result_data.get(
-                        "request", "Неизвестная ошибка получения результата"
-                    )
-                    self.logger.error(
-                        "Ошибка при получении решения капчи: %s", error_text
-                    )
-                    if "ERROR_CAPTCHA_UNSOLVABLE" in error_text:
-                        raise CaptchaServiceError(
-                            "Капча не может быть решена. Возможно, она слишком сложная."
-                        )
-                    raise CaptchaServiceError(f"Ошибка сервиса капчи: {error_text}")
-            self.logger.warning(
-                "Не удалось получить решение капчи за отведенное время."
-            )
-            return None
+            return await solver.solve(image_base64, vernet=vernet_param)
         except CaptchaServiceError:
             raise
         except Exception as e:
@@ -300,6 +144,7 @@ class UniversalScraper:
         self.logger.info("Успешный клик по элементу: %s", selector_value)
         time.sleep(2)
 
+    @traced()
     def _get_page_content(self, target_name: str, url: str, wait_for: tuple):
         try:
             self.driver.get(url)
@@ -346,29 +191,61 @@ class UniversalScraper:
             )
             return None
 
-    def run_registry_scrapers(self) -> dict[str, list]:
-        self.logger.info("=== ЗАПУСК СКРАПИНГА РЕЕСТРОВ ===")
-        all_data = {}
-        for i, (name, config) in enumerate(list(self._REGISTRY_TARGETS.items())):
-            self.logger.info("--- Начинаю обработку: %s (%s) ---", name, config["url"])
+    @classmethod
+    def registry_names(cls) -> list[str]:
+        return list(cls._REGISTRY_TARGETS)
+
+    @classmethod
+    def registry_target(cls, name: str) -> dict:
+        return cls._REGISTRY_TARGETS[name]
+
+    @classmethod
+    def parse_registry(
+        cls, name: str, html_content: str, known_hash: str | None = None
+    ) -> tuple[str, list[dict] | None]:
+        """
+        Отпечаток контента и записи реестра по одному дереву выбранного
+        бэкенда. Записи — None, если отпечаток совпал с known_hash.
+        """
+        sections = cls._REGISTRY_TARGETS[name]["sections"]
+        with registry_parse_seconds.labels(name).time():
+            content_hash, items = cls.parser_backend.parse_registry_page(
+                name, html_content, sections, known_hash
+            )
+        if items is not None:
+            registry_rows.labels(name).set(len(items))
+        return content_hash, items
+
+    def fetch_registry_page(self, name: str) -> str | None:
+        config = self._REGISTRY_TARGETS[name]
+        self.logger.info("--- Начинаю обработку: %s (%s) ---", name, config["url"])
+        with registry_fetch_seconds.labels(name, "browser").time():
             html_content = self._get_page_content(
                 name, config["url"], config["wait_for"]
             )
-            if not html_content:
-                self.logger.warning("Не удалось получить контент для %s.", name)
-                all_data[name] = []
-                continue
-            parsed_data = getattr(self, config["parser_method"])(html_content)
-            all_data[name] = parsed_data
-            self.logger.info(
-                "Парсинг %s завершен. Найдено записей: %d", name, len(parsed_data)
-            )
-            if i < len(self._REGISTRY_TARGETS) - 1:
-                time.sleep(2)
-        self.logger.info("=== СКРАПИНГ РЕЕСТРОВ ЗАВЕРШЕН ===")
-        return all_data
+        if not html_content:
+            self.logger.warning("Не удалось получить контент для %s.", name)
+        return html_content
+
+    @traced()
+    def _open_blocklist_page(self, site_url: str):
+        self.driver.get(site_url)
+        time.sleep(1)
 
-    def check_rkn_blocklist(self, domain_to_check: str) -> dict:
+    @traced()
+    def _submit_blocklist_form(
+        self, captcha_solution: str, domain_to_check: str
+    ) -> dict | None:
+        self.driver.find_element(By.ID, "captcha").send_keys(captcha_solution)
+        self.driver.find_element(By.ID, "inputMsg").send_keys(domain_to_check)
+        self.driver.find_element(By.ID, "send_but2").click()
+        self.logger.info("Данные для проверки '%s' отправлены.", domain_to_check)
+        time.sleep(5)
+        return self._parse_rkn_blocklist_result(self.driver.page_source)
+
+    async def check_rkn_blocklist_async(
+        self, domain_to_check: str, solver: CapGuruClient
+    ) -> dict:
         site_url = "https://blocklist.rkn.gov.ru/"
         self.logger.info(
             "--- Начинаю проверку '%s' на сайте %s ---", domain_to_check, site_url
@@ -376,9 +253,8 @@ class UniversalScraper:
         max_retries = 15
         for attempt in range(max_retries):
             try:
-                self.driver.get(site_url)
-                time.sleep(1)
-                captcha_solution = self._solve_captcha(vernet_param=2)
+                await asyncio.to_thread(self._open_blocklist_page, site_url)
+                captcha_solution = await self._solve_captcha(solver, vernet_param=2)
                 if not captcha_solution:
                     self.logger.warning(
                         "Не удалось решить капчу (попытка %d/%d).",
@@ -386,27 +262,21 @@ class UniversalScraper:
                         max_retries,
                     )
                     continue
-                self.driver.find_element(By.ID, "captcha").send_keys(captcha_solution)
-                self.driver.find_element(By.ID, "inputMsg").send_keys(domain_to_check)
-                self.driver.find_element(By.ID, "send_but2").click()
-                self.logger.info(
-                    "Данные для проверки '%s' отправлены.", domain_to_check
+                result = await asyncio.to_thread(
+                    self._submit_blocklist_form, captcha_solution, domain_to_check
                 )
-                time.sleep(5)
-                soup = BeautifulSoup(self.driver.page_source, "html.parser")
-                error_div = soup.find("div", id="error")
-                if (
-                    error_div
-                    and "неверно указан защитный код"
-                    in error_div.get_text(strip=True).lower()
-                ):
+                if result is None:
                     self.logger.warning(
                         "Ошибка: неверно указан защитный код (попытка %d/%d).",
                         attempt + 1,
                         max_retries,
                     )
+                    captcha_results.labels("rejected").inc()
                     continue
-                return self._parse_rkn_blocklist_result(soup)
+                blocklist_check_attempts.observe(attempt + 1)
+                return result
+            except CaptchaServiceError:
+                raise
             except Exception as e:
                 self.logger.error(
                     "Критическая ошибка при проверке blocklist (попытка %d/%d): %s",
@@ -415,12 +285,17 @@ class UniversalScraper:
                     e,
                     exc_info=True,
                 )
-                time.sleep(5)
+                await asyncio.sleep(5)
+        blocklist_check_attempts.observe(max_retries)
         return {
-            "статус": f"Критическая ошибка: не удалось выполнить проверку для '{domain_to_check}' после {max_retries} попыток."
+            "статус": f"Критическая ошибка: не удалось выполнить проверку для '{domain_to_check}' после {max_retries} попыток.",
+            "ошибка": True,
         }
 
     def close(self):
+        if self.driver and not self._owns_driver:
+            self.driver = None
+            return
         if self.driver:
             self.logger.info("Закрытие драйвера WebDriver...")
             self.driver.quit()
@@ -0,0 +1,224 @@
+import codecs
+import hashlib
+import re
+from html.parser import HTMLParser
+from typing import IO, Iterable, Iterator
+
+from scraper_tool.metrics import registry_parse_seconds, registry_rows
+from scraper_tool.parsers import SKIPPED_TEXT_TAGS
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_CHUNK_SIZE = 64 * 1024
+
+
+class _Cell:
+    __slots__ = ("tag", "parts", "divs")
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.parts: list[str] = []
+        self.divs: list[list[str]] = []
+
+
+def _text(parts: list[str], separator: str = "") -> str:
+    """Аналог BeautifulSoup.get_text(separator, strip=True)."""
+    return separator.join(part.strip() for part in parts if part.strip())
+
+
+class _TableRowParser(HTMLParser):
+    """
+    Потоковый разбор одной таблицы страницы: строки <tr> выдаются по мере
+    закрытия, в памяти держится только текущая строка. Текстовые узлы
+    собираются так же, как их видит BeautifulSoup с html.parser.
+    """
+
+    def __init__(self, table_class: str | None):
+        super().__init__(convert_charrefs=True)
+        self.table_class = table_class
+        self.rows: list[list[_Cell]] = []
+        self.done = False
+
+        self._table_depth = 0
+        self._skip_depth = 0
+        self._row: list[_Cell] | None = None
+        self._cell: _Cell | None = None
+        self._open_divs: list[list[str]] = []
+        self._text: list[str] = []
+
+    def _is_target_table(self, attrs) -> bool:
+        if self.table_class is None:
+            return True
+        classes = dict(attrs).get("class") or ""
+        return self.table_class in classes.split()
+
+    def _flush_text(self):
+        if not self._text:
+            return
+        text = "".join(self._text)
+        self._text = []
+        if self._cell is not None:
+            self._cell.parts.append(text)
+            for div in self._open_divs:
+                div.append(text)
+
+    def _close_cell(self):
+        if self._cell is not None and self._row is not None:
+            self._row.append(self._cell)
+        self._cell = None
+        self._open_divs = []
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+        self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if self.done:
+            return
+        if tag in SKIPPED_TEXT_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == "table":
+            if self._table_depth:
+                self._table_depth += 1
+            elif self._is_target_table(attrs):
+                self._table_depth = 1
+            return
+        if not self._table_depth:
+            return
+        if tag == "tr":
+            self._close_row()
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._close_cell()
+            self._cell = _Cell(tag)
+        elif tag == "div" and self._cell is not None:
+            div: list[str] = []
+            self._cell.divs.append(div)
+            self._open_divs.append(div)
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_text()
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag in SKIPPED_TEXT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self.done or not self._table_depth:
+            return
+        if tag == "table":
+            self._table_depth -= 1
+            if not self._table_depth:
+                self._close_row()
+                self.done = True
+        elif tag == "tr":
+            self._close_row()
+        elif tag in ("td", "th"):
+            self._close_cell()
+        elif tag == "div" and self._open_divs:
+            self._open_divs.pop()
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def drain(self) -> list[list[_Cell]]:
+        rows, self.rows = self.rows, []
+        return rows
+
+
+def _minjust_row(cells: list[_Cell]) -> dict | None:
+    tds = [cell for cell in cells if cell.tag == "td"]
+    ths = [cell for cell in cells if cell.tag == "th"]
+    if len(tds) < 4:
+        return None
+    if len(ths) > 3 and "Полное и сокращенное" in "".join(ths[3].parts):
+        return None
+
+    name = _text(tds[3].parts)
+    if not name:
+        return None
+
+    number, order, decision = (_text(cell.parts) for cell in tds[:3])
+    details_parts = []
+    if number:
+        details_parts.append(f"Номер в перечне: {number}")
+    if order:
+        details_parts.append(f"Распоряжение Минюста: {order}")
+    if decision:
+        details_parts.append(f"Решение Генпрокуратуры: {decision}")
+    return {"name": name, "details": " | ".join(details_parts)}
+
+
+def _fsb_row(cells: list[_Cell]) -> dict | None:
+    tds = [cell for cell in cells if cell.tag == "td"]
+    if len(tds) != 3:
+        return None
+    name = _text(tds[1].parts, separator=" ")
+    court_info = " ".join(_text(div) for div in tds[2].divs)
+    return {"name": name, "details": _WHITESPACE_RE.sub(" ", court_info).strip()}
+
+
+# Реестры, которые можно разбирать потоково: выбор таблицы и сборка записи
+# повторяют HtmlParserBackend.parse_minjust / parse_fsb
+STREAMING_TARGETS = {
+    "minjust": {"table_class": None, "skip_rows": 0},
+    "fsb": {"table_class": "table", "skip_rows": 1},
+}
+_ROW_BUILDERS = {"minjust": _minjust_row, "fsb": _fsb_row}
+
+
+def iter_registry_rows(name: str, chunks: Iterable[str]) -> Iterator[dict]:
+    target = STREAMING_TARGETS[name]
+    build_row = _ROW_BUILDERS[name]
+    parser = _TableRowParser(target["table_class"])
+    to_skip = target["skip_rows"]
+
+    def _rows():
+        nonlocal to_skip
+        for cells in parser.drain():
+            if to_skip:
+                to_skip -= 1
+                continue
+            row = build_row(cells)
+            if row is not None:
+                yield row
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _rows()
+        if parser.done:
+            return
+    parser.close()
+    yield from _rows()
+
+
+def iter_text_chunks(file: IO[bytes], encoding: str) -> Iterator[str]:
+    file.seek(0)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    while True:
+        block = file.read(_CHUNK_SIZE)
+        if not block:
+            break
+        yield decoder.decode(block)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def stream_fingerprint(name: str, file: IO[bytes], encoding: str) -> tuple[str, int]:
+    """Хеш разобранных строк таблицы и их число — без нормализации и записи."""
+    digest = hashlib.sha256()
+    row_count = 0
+    with registry_parse_seconds.labels(name).time():
+        for row in iter_registry_rows(name, iter_text_chunks(file, encoding)):
+            digest.update(f"{row['name']}\x1f{row['details']}\n".encode("utf-8"))
+            row_count += 1
+    registry_rows.labels(name).set(row_count)
+    return digest.hexdigest(), row_count
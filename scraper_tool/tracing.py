@@ -0,0 +1,162 @@
+import functools
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Больше спанов в одну трассу не пишется: цикл повторов не раздувает память
+MAX_SPANS = 500
+
+_current_trace: ContextVar["Trace | None"] = ContextVar("trace", default=None)
+_current_span: ContextVar["Span | None"] = ContextVar("span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "depth", "started", "duration", "error", "_token")
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+        self.duration: float | None = None
+        self.error: str | None = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """
+    Трасса одного запроса: correlation id и плоский список спанов в порядке
+    начала. Спаны из asyncio.to_thread попадают сюда же — контекст копируется.
+    """
+
+    __slots__ = ("name", "correlation_id", "started", "duration", "spans", "dropped")
+
+    def __init__(self, name: str, correlation_id: str):
+        self.name = name
+        self.correlation_id = correlation_id
+        self.started = time.perf_counter()
+        self.duration: float | None = None
+        self.spans: list[Span] = []
+        self.dropped = 0
+
+    def breakdown(self) -> list[dict]:
+        return [
+            {
+                "name": span.name,
+                "depth": span.depth,
+                "offset_ms": round((span.started - self.started) * 1000, 1),
+                "duration_ms": (
+                    round(span.duration * 1000, 1)
+                    if span.duration is not None
+                    else None
+                ),
+                **({"error": span.error} if span.error else {}),
+            }
+            for span in self.spans
+        ]
+
+    def render(self) -> str:
+        lines = [
+            f"Медленный запрос {self.correlation_id} ({self.name}): "
+            f"{self.duration * 1000:.1f} мс"
+        ]
+        for item in self.breakdown():
+            duration = item["duration_ms"]
+            duration = "не завершен" if duration is None else f"{duration} мс"
+            error = f" [{item['error']}]" if "error" in item else ""
+            lines.append(
+                f"{'  ' * (item['depth'] + 1)}{item['name']}: {duration}"
+                f" (+{item['offset_ms']} мс){error}"
+            )
+        if self.dropped:
+            lines.append(f"  ... еще спанов: {self.dropped}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def start_trace(name: str, correlation_id: str, slow_threshold: float | None = None):
+    """
+    Открывает трассу на время блока. Если она длилась дольше slow_threshold
+    секунд, разбивка по спанам пишется в лог одной записью.
+    """
+    current = Trace(name, correlation_id)
+    trace_token = _current_trace.set(current)
+    span_token = _current_span.set(None)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.started
+        _current_span.reset(span_token)
+        if slow_threshold is not None and current.duration >= slow_threshold:
+            # Запись идет внутри трассы, чтобы в ней был ее correlation id
+            logger.warning(current.render(), extra={"spans": current.breakdown()})
+        _current_trace.reset(trace_token)
+
+
+def span(name: str):
+    """Спан в текущей трассе; вне трассы ничего не стоит и не пишет."""
+    current = _current_trace.get()
+    if current is None:
+        return _NOOP_SPAN
+    if len(current.spans) >= MAX_SPANS:
+        current.dropped += 1
+        return _NOOP_SPAN
+    parent = _current_span.get()
+    new_span = Span(name, 0 if parent is None else parent.depth + 1)
+    current.spans.append(new_span)
+    return new_span
+
+
+def traced(name: str | None = None):
+    """Декоратор: вызов функции (обычной или корутины) — отдельный спан."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_correlation_id() -> str | None:
+    current = _current_trace.get()
+    return current.correlation_id if current is not None else None
@@ -0,0 +1,79 @@
+"""
+Нормализация строк реестров: в одном процессе и в пуле процессов, строк
+в секунду.
+
+    python -m tests.bench_normalizer [число строк] [число процессов]
+"""
+
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bot.normalizer import _translit_token, normalize_batch
+
+CHUNK_SIZE = 1000
+
+_WORDS = (
+    "общество", "ограниченной", "ответственностью", "фонд", "центр",
+    "содействия", "развитию", "региональное", "движение", "союз", "правовой",
+    "защиты", "граждан", "информационный", "свобода", "независимый",
+)  # fmt: skip
+
+
+def registry_rows(count: int) -> list[tuple[str, str]]:
+    # Номер в каждом слове: кэш транслитерации не сводит замер к поиску в словаре
+    rows = []
+    for i in range(count):
+        words = " ".join(
+            f"{_WORDS[(i + k) % len(_WORDS)]}{i % 997 + k}" for k in range(4)
+        )
+        rows.append(
+            (
+                f"Автономная некоммерческая организация «{words}» (АНО «Союз {i}»)",
+                f"Номер в перечне: {i} | ОГРН: «{1027700000000 + i}»",
+            )
+        )
+    return rows
+
+
+def _chunks(rows: list, size: int) -> list[list]:
+    return [rows[i : i + size] for i in range(0, len(rows), size)]
+
+
+def inline(rows: list) -> int:
+    _translit_token.cache_clear()
+    return sum(len(normalize_batch(chunk)) for chunk in _chunks(rows, CHUNK_SIZE))
+
+
+def pooled(executor: ProcessPoolExecutor, rows: list) -> int:
+    chunks = _chunks(rows, CHUNK_SIZE)
+    return sum(len(vectors) for vectors in executor.map(normalize_batch, chunks))
+
+
+def _measure(run, rows: list) -> tuple[int, float]:
+    started = time.perf_counter()
+    count = run(rows)
+    return count, count / (time.perf_counter() - started)
+
+
+def main(count: int, workers: int):
+    rows = registry_rows(count)
+    print(f"{'режим':<16} {'строк':>8} {'строк/с':>12}")
+    done, rate = _measure(inline, rows)
+    print(f"{'один процесс':<16} {done:>8} {rate:>12,.0f}")
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        # Запуск процессов и импорт модулей в замер не входят
+        list(executor.map(normalize_batch, [[("прогрев", None)]] * workers))
+        done, rate = _measure(lambda batch: pooled(executor, batch), rows)
+    print(f"{f'пул, {workers} проц.':<16} {done:>8} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count(),
+    )
@@ -0,0 +1,65 @@
+"""
+Скорость разбора реестров по бэкендам, записей в секунду.
+
+    python -m tests.bench_parsers [число строк]
+"""
+
+import sys
+import time
+
+from scraper_tool.parsers import get_parser_backend
+from scraper_tool.streaming import iter_registry_rows
+
+BACKENDS = ("html.parser", "lxml", "selectolax")
+
+
+def minjust_page(rows: int) -> str:
+    body = "".join(
+        f"<tr><td>{i}</td><td>от 01.02.2016 № {i}</td>"
+        f"<td>Решение от 15.01.2016</td>"
+        f"<td>Организация &laquo;Номер {i}&raquo; <br>(ООО &quot;{i}&quot;)</td></tr>\n"
+        for i in range(1, rows + 1)
+    )
+    return (
+        "<html><body><table><tr><th>№</th><th>Распоряжение</th><th>Решение</th>"
+        f"<th>Полное и сокращенное наименование</th></tr>\n{body}</table></body></html>"
+    )
+
+
+def fsb_page(rows: int) -> str:
+    body = "".join(
+        f"<tr><td>{i}.</td><td>Организация {i}</td><td><div>Решение суда</div>"
+        f"<div>от 14.02.2003 № {i}</div></td></tr>\n"
+        for i in range(1, rows + 1)
+    )
+    return (
+        '<html><body><table class="table"><tbody><tr><td>№</td><td>Наименование</td>'
+        f"<td>Решение</td></tr>\n{body}</tbody></table></body></html>"
+    )
+
+
+def _measure(parse, html: str, repeat: int = 3) -> tuple[int, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = len(parse(html))
+        best = min(best, time.perf_counter() - started)
+    return count, count / best
+
+
+def main(rows: int):
+    pages = {"minjust": minjust_page(rows), "fsb": fsb_page(rows)}
+    print(f"{'реестр':<8} {'бэкенд':<12} {'записей':>8} {'записей/с':>12}")
+    for registry, html in pages.items():
+        for backend in BACKENDS:
+            parser = getattr(get_parser_backend(backend), f"parse_{registry}")
+            count, rate = _measure(parser, html)
+            print(f"{registry:<8} {backend:<12} {count:>8} {rate:>12,.0f}")
+        count, rate = _measure(
+            lambda page: list(iter_registry_rows(registry, [page])), html
+        )
+        print(f"{registry:<8} {'streaming':<12} {count:>8} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
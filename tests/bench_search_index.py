@@ -0,0 +1,83 @@
+"""
+Поиск совпадения: индекс в памяти против LIKE '%слово%' по каждому слову
+(SQLite в памяти вместо MySQL — тот же полный просмотр), запросов в секунду
+по каждому запросу.
+
+    python -m tests.bench_search_index [число строк]
+"""
+
+import random
+import sqlite3
+import sys
+import time
+
+from bot.normalizer import split_search_query
+from bot.search_index import IndexSnapshot
+
+_SYLLABLES = ("ро", "ма", "шка", "фо", "нд", "сво", "бо", "да", "цен", "тр", "ю", "з")
+
+QUERIES = (
+    "ромашка",
+    "фонд свобода",
+    "центр ромашка фонд",
+    "я",
+    "несуществующее название",
+    "ооо рога и копыта",
+)
+
+
+def registry_vectors(count: int) -> list[str]:
+    rng = random.Random(1)
+    return [
+        " ".join(
+            "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.randint(3, 8))
+        )
+        for _ in range(count)
+    ]
+
+
+def like_search(connection: sqlite3.Connection, words: list[str]) -> bool:
+    where = " AND ".join("search_vector LIKE ?" for _ in words)
+    row = connection.execute(
+        f"SELECT id FROM items WHERE {where} LIMIT 1", [f"%{w}%" for w in words]
+    ).fetchone()
+    return row is not None
+
+
+def _measure(search, queries: list[list[str]], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for words in queries:
+            search(words)
+        best = min(best, time.perf_counter() - started)
+    return len(queries) / best
+
+
+def main(rows: int):
+    vectors = registry_vectors(rows)
+    queries = [split_search_query(query) for query in QUERIES]
+
+    started = time.perf_counter()
+    snapshot = IndexSnapshot(enumerate(vectors, 1))
+    print(f"Индекс на {rows} строк построен за {time.perf_counter() - started:.2f} с")
+
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        "CREATE TABLE items (id INTEGER PRIMARY KEY, search_vector TEXT)"
+    )
+    connection.executemany("INSERT INTO items VALUES (?, ?)", enumerate(vectors, 1))
+
+    print(f"{'запрос':<26} {'найдено':>8} {'index, 1/с':>12} {'like, 1/с':>12}")
+    for query, words in zip(QUERIES, queries):
+        found = snapshot.find_first_match(words)
+        if found != like_search(connection, words):
+            raise AssertionError(f"Индекс и LIKE расходятся на запросе '{query}'")
+        index_rate = _measure(snapshot.find_first_match, [words])
+        like_rate = _measure(lambda w: like_search(connection, w), [words])
+        print(f"{query:<26} {str(found):>8} {index_rate:>12,.0f} {like_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,142 @@
+import asyncio
+from itertools import islice
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from scraper_tool.captcha import CapGuruClient, CaptchaServiceError
+
+
+class FastClient(CapGuruClient):
+    """Те же правила опроса, но в сотых долях секунды."""
+
+    _MIN_INTERVAL = 0.01
+    _MAX_INTERVAL = 0.05
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Статистики хватает для адаптивных задержек вместо 5 с по умолчанию
+        self._solve_times.extend([0.01, 0.02, 0.02, 0.03, 0.04])
+
+
+class CapGuruStub:
+    """Локальные in.php/res.php: ответы res.php выдаются по очереди."""
+
+    def __init__(self, submit: dict, results: list[dict]):
+        self.submit = submit
+        self.results = list(results)
+        self.submitted: list[dict] = []
+        self.polls: list[dict] = []
+
+    async def in_php(self, request: web.Request) -> web.Response:
+        self.submitted.append(dict(await request.post()))
+        return web.json_response(self.submit)
+
+    async def res_php(self, request: web.Request) -> web.Response:
+        self.polls.append(dict(request.query))
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        return web.json_response(result)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/in.php", self.in_php)
+        app.router.add_get("/res.php", self.res_php)
+        return app
+
+
+NOT_READY = {"status": 0, "request": "CAPCHA_NOT_READY"}
+
+
+def _solve(stub: CapGuruStub, max_wait: float = 5):
+    async def run():
+        async with TestServer(stub.app()) as server:
+            client = FastClient(
+                "key", base_url=str(server.make_url("")), max_wait=max_wait
+            )
+            try:
+                return await client.solve("aW1hZ2U=", vernet=2)
+            finally:
+                await client.close()
+
+    return asyncio.run(run())
+
+
+def test_solves_after_not_ready_polls():
+    stub = CapGuruStub(
+        {"status": 1, "request": "42"},
+        [NOT_READY, NOT_READY, {"status": 1, "request": "x7k2"}],
+    )
+    assert _solve(stub) == "x7k2"
+    assert stub.submitted == [
+        {"key": "key", "method": "base64", "body": "aW1hZ2U=", "json": "1"}
+    ]
+    assert len(stub.polls) == 3
+    assert {(p["id"], p["vernet"], p["action"]) for p in stub.polls} == {
+        ("42", "2", "get")
+    }
+
+
+@pytest.mark.parametrize(
+    "error, message",
+    [
+        ("ERROR_ZERO_BALANCE", "Закончились средства"),
+        ("ERROR_WRONG_USER_KEY", "ERROR_WRONG_USER_KEY"),
+    ],
+)
+def test_submit_errors(error: str, message: str):
+    stub = CapGuruStub({"status": 0, "request": error}, [NOT_READY])
+    with pytest.raises(CaptchaServiceError, match=message):
+        _solve(stub)
+    assert stub.polls == []
+
+
+@pytest.mark.parametrize(
+    "error, message",
+    [
+        ("ERROR_CAPTCHA_UNSOLVABLE", "не может быть решена"),
+        ("ERROR_WRONG_CAPTCHA_ID", "ERROR_WRONG_CAPTCHA_ID"),
+    ],
+)
+def test_result_errors(error: str, message: str):
+    stub = CapGuruStub(
+        {"status": 1, "request": "42"}, [NOT_READY, {"status": 0, "request": error}]
+    )
+    with pytest.raises(CaptchaServiceError, match=message):
+        _solve(stub)
+    assert len(stub.polls) == 2
+
+
+def test_gives_up_after_max_wait():
+    stub = CapGuruStub({"status": 1, "request": "42"}, [NOT_READY])
+    assert _solve(stub, max_wait=0.3) is None
+    assert stub.polls
+    assert len(stub.polls) < 30
+
+
+def test_network_error_on_submit():
+    async def run():
+        client = CapGuruClient("key", base_url="http://127.0.0.1:9", request_timeout=2)
+        try:
+            await client.submit("aW1hZ2U=")
+        finally:
+            await client.close()
+
+    with pytest.raises(CaptchaServiceError, match="ошибка сети"):
+        asyncio.run(run())
+
+
+def test_poll_delays_without_history():
+    delays = list(islice(CapGuruClient("key")._poll_delays(), 6))
+    assert delays == [5.0, 3.0, 4.5, 6.75, 10.0, 10.0]
+
+
+def test_poll_delays_follow_solve_times():
+    client = CapGuruClient("key")
+    client._solve_times.extend([8, 10, 12, 14, 16, 18, 20, 22, 24, 30])
+    delays = list(islice(client._poll_delays(), 11))
+    # Первый опрос на p25 (12 с), каждые (p75 - p25) / 4 до p90 (30 с),
+    # затем backoff
+    assert delays[0] == 12
+    assert delays[1:9] == [2.5] * 8
+    assert delays[9:] == [3.75, 5.625]
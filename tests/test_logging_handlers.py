@@ -0,0 +1,90 @@
+import io
+import json
+import logging
+from logging.handlers import QueueListener
+
+from bot.logging_handlers import BoundedQueueHandler, CorrelationIdFilter, JsonFormatter
+from scraper_tool.tracing import start_trace
+
+
+def _record(level: int, message: str) -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {"name": "test", "levelno": level, "levelname": "", "msg": message}
+    )
+
+
+def _drain(handler: BoundedQueueHandler) -> list[str]:
+    messages = []
+    while not handler.queue.empty():
+        messages.append(handler.queue.get_nowait().getMessage())
+    return messages
+
+
+def test_full_queue_drops_info():
+    handler = BoundedQueueHandler(maxsize=3)
+    for i in range(3):
+        handler.handle(_record(logging.INFO, f"info {i}"))
+
+    handler.handle(_record(logging.INFO, "info lost"))
+    handler.handle(_record(logging.DEBUG, "debug lost"))
+    assert handler.dropped == 2
+    assert _drain(handler) == ["info 0", "info 1", "info 2"]
+
+
+def test_full_queue_evicts_oldest_for_warnings():
+    handler = BoundedQueueHandler(maxsize=3)
+    for i in range(3):
+        handler.handle(_record(logging.INFO, f"info {i}"))
+    # WARNING и выше вытесняют самую старую запись
+    handler.handle(_record(logging.ERROR, "error kept"))
+    assert handler.dropped == 1
+    assert _drain(handler) == ["info 1", "info 2", "error kept"]
+
+
+def test_drop_count_reported_when_queue_frees_up():
+    handler = BoundedQueueHandler(maxsize=4)
+    for i in range(6):
+        handler.handle(_record(logging.INFO, f"info {i}"))
+    assert handler.dropped == 2
+    _drain(handler)
+
+    handler.handle(_record(logging.INFO, "next"))
+    messages = _drain(handler)
+    assert messages[0] == "Очередь логов переполнена, потеряно записей: 2."
+    assert messages[1] == "next"
+    assert handler.dropped == 0
+
+
+def test_exc_info_survives_queue_into_json():
+    handler = BoundedQueueHandler(maxsize=10)
+    handler.addFilter(CorrelationIdFilter())
+    json_stream, text_stream = io.StringIO(), io.StringIO()
+    json_writer = logging.StreamHandler(json_stream)
+    json_writer.setFormatter(JsonFormatter())
+    text_writer = logging.StreamHandler(text_stream)
+    text_writer.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(handler.queue, json_writer, text_writer)
+
+    logger = logging.getLogger("test.exc_info")
+    logger.propagate = False
+    logger.addHandler(handler)
+    listener.start()
+    try:
+        with start_trace("job", "job-9"):
+            try:
+                {}["missing"]
+            except KeyError:
+                logger.exception("Сбой %s", "обработки")
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    payload = json.loads(json_stream.getvalue())
+    assert payload["message"] == "Сбой обработки"
+    assert payload["correlation_id"] == "job-9"
+    assert payload["exc_info"].startswith("Traceback (most recent call last):")
+    assert "KeyError: 'missing'" in payload["exc_info"]
+    # В тексте трассировка одна, после сообщения
+    text = text_stream.getvalue()
+    assert text.startswith("Сбой обработки\nTraceback")
+    assert text.count("KeyError: 'missing'") == 1
@@ -0,0 +1,76 @@
+import pytest
+
+from scraper_tool.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+def test_counter_with_labels(registry: MetricsRegistry):
+    counter = Counter("jobs", "Обработанные задачи", ("result",), registry=registry)
+    counter.labels("ok").inc()
+    counter.labels("ok").inc(2)
+    counter.labels("error").inc()
+    assert registry.render() == (
+        "# HELP jobs Обработанные задачи\n"
+        "# TYPE jobs counter\n"
+        'jobs_total{result="ok"} 3\n'
+        'jobs_total{result="error"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry: MetricsRegistry):
+    histogram = Histogram(
+        "latency_seconds", "Задержка", buckets=(0.5, 0.1, 1), registry=registry
+    )
+    for value in (0.05, 0.1, 0.3, 0.7, 2.5):
+        histogram.observe(value)
+    lines = registry.render().splitlines()
+    assert lines[1] == "# TYPE latency_seconds histogram"
+    # Границы сортируются, значение на границе попадает в ее корзину (le)
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="0.5"} 3',
+        'latency_seconds_bucket{le="1"} 4',
+        'latency_seconds_bucket{le="+Inf"} 5',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 5",
+    ]
+
+
+def test_histogram_labels_and_timer(registry: MetricsRegistry):
+    histogram = Histogram(
+        "fetch_seconds", "Загрузка", ("source",), buckets=(60,), registry=registry
+    )
+    with histogram.labels("fsb").time():
+        pass
+    lines = registry.render().splitlines()
+    assert 'fetch_seconds_bucket{source="fsb",le="60"} 1' in lines
+    assert 'fetch_seconds_count{source="fsb"} 1' in lines
+
+
+def test_label_and_help_escaping(registry: MetricsRegistry):
+    gauge = Gauge("rows", 'Строки "реестра"\\', ("source",), registry=registry)
+    gauge.labels('a"b\\c\nd').set(1.5)
+    assert registry.render().splitlines() == [
+        '# HELP rows Строки \\"реестра\\"\\\\',
+        "# TYPE rows gauge",
+        'rows{source="a\\"b\\\\c\\nd"} 1.5',
+    ]
+
+
+def test_gauge_function(registry: MetricsRegistry):
+    pending = [3]
+    Gauge("pending", "Ожидают", function=lambda: pending[0], registry=registry)
+    pending[0] = 7
+    assert registry.render().splitlines()[-1] == "pending 7"
+
+
+def test_wrong_label_count_and_duplicates(registry: MetricsRegistry):
+    counter = Counter("checks", "Проверки", ("result",), registry=registry)
+    with pytest.raises(ValueError):
+        counter.labels("ok", "extra")
+    with pytest.raises(ValueError):
+        Counter("checks", "Повтор", registry=registry)
@@ -0,0 +1,84 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+from scraper_tool.parsers import get_parser_backend
+from scraper_tool.streaming import iter_registry_rows
+
+FIXTURES = Path(__file__).parent / "fixtures" / "registry"
+EXPECTED = json.loads((FIXTURES / "expected.json").read_text(encoding="utf-8"))
+
+
+def _optional(backend: str, module: str):
+    # lxml и selectolax в requirements.txt закомментированы
+    return pytest.param(
+        backend,
+        marks=pytest.mark.skipif(
+            importlib.util.find_spec(module) is None,
+            reason=f"{module} не установлен",
+        ),
+    )
+
+
+BACKENDS = (
+    "html.parser",
+    _optional("lxml", "lxml"),
+    _optional("selectolax", "selectolax"),
+)
+PAGES = {
+    "minjust": "parse_minjust",
+    "fedfsm": "parse_fedfsm",
+    "fsb": "parse_fsb",
+    "fsb_no_tbody": "parse_fsb",
+    "rkn_found": "parse_rkn_blocklist_page",
+    "rkn_found_no_tbody": "parse_rkn_blocklist_page",
+    "rkn_not_found": "parse_rkn_blocklist_page",
+    "rkn_bad_captcha": "parse_rkn_blocklist_page",
+    "rkn_no_result": "parse_rkn_blocklist_page",
+}
+STREAMING_PAGES = {"minjust": "minjust", "fsb": "fsb", "fsb_no_tbody": "fsb"}
+
+
+def _page(name: str) -> str:
+    return (FIXTURES / f"{name}.html").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("page", PAGES)
+def test_backend_matches_golden(backend: str, page: str):
+    parser = get_parser_backend(backend)
+    assert getattr(parser, PAGES[page])(_page(page)) == EXPECTED[page]
+
+
+@pytest.mark.parametrize("chunk_size", (7, 1 << 20))
+@pytest.mark.parametrize("page", STREAMING_PAGES)
+def test_streaming_matches_golden(page: str, chunk_size: int):
+    html = _page(page)
+    chunks = [html[i : i + chunk_size] for i in range(0, len(html), chunk_size)]
+    rows = list(iter_registry_rows(STREAMING_PAGES[page], chunks))
+    assert rows == EXPECTED[page]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "registry, sections",
+    [("minjust", ["table"]), ("fsb", ["table.table"])],
+)
+def test_registry_page_fingerprint(backend: str, registry: str, sections: list):
+    parser = get_parser_backend(backend)
+    html = _page(registry)
+    content_hash, items = parser.parse_registry_page(registry, html, sections)
+    assert items == EXPECTED[registry]
+
+    # Совпавший отпечаток: записи не разбираются
+    assert parser.parse_registry_page(registry, html, sections, content_hash) == (
+        content_hash,
+        None,
+    )
+    # Изменения вне разделов отпечаток не меняют, внутри таблицы — меняют
+    outside = html.replace("</body>", "<p>счетчик 42</p></body>")
+    assert parser.parse_registry_page(registry, outside, sections)[0] == content_hash
+    inside = html.replace("</table>", "<tr><td>новая</td></tr></table>", 1)
+    assert parser.parse_registry_page(registry, inside, sections)[0] != content_hash
@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+
+from bot.rkn_dump import RknDump, RknDumpSnapshot
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def csv_dump() -> RknDump:
+    dump = RknDump()
+    dump.load(str(FIXTURES / "rkn_dump.csv"), encoding="cp1251")
+    return dump
+
+
+@pytest.fixture(scope="module")
+def xml_dump() -> RknDump:
+    dump = RknDump()
+    dump.load(str(FIXTURES / "rkn_dump.xml"))
+    return dump
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("blocked.ru", "exact"),
+        ("www.blocked.ru", "exact"),
+        ("mask.ru", "wildcard"),
+        ("a.mask.ru", "wildcard"),
+        ("page.org", "url"),
+        ("x.net", "url"),
+        ("1.2.3.4", "ip"),
+        ("9.9.9.9", "ip"),
+        ("192.168.5.5", "subnet"),
+        ("192.169.0.1", None),
+        ("пример.рф", "exact"),
+        ("xn--e1afmkfd.xn--p1ai", "exact"),
+        ("free.ru", None),
+    ],
+)
+def test_csv_columns(csv_dump: RknDump, host: str, expected: str | None):
+    assert csv_dump.match(host) == expected
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("blocked.ru", "exact"),
+        ("a.mask.ru", "wildcard"),
+        ("page.org", "url"),
+        ("x.net", "url"),
+        ("1.2.3.4", "ip"),
+        ("10.20.30.40", "subnet"),
+        ("11.0.0.1", None),
+        ("free.ru", None),
+    ],
+)
+def test_xml(xml_dump: RknDump, host: str, expected: str | None):
+    assert xml_dump.match(host) == expected
+
+
+@pytest.mark.parametrize("host", ["sub.vk.com", "www.sub.vk.com", "a.b.vk.com"])
+def test_url_entry_is_not_a_parent(csv_dump: RknDump, host: str):
+    # Заблокирована одна страница vk.com, а не весь домен с поддоменами
+    assert csv_dump.match(host) is None
+
+
+def test_url_entry_matches_own_host_only(csv_dump: RknDump):
+    assert csv_dump.match("vk.com") == "url"
+    assert csv_dump.match("vk.com", parents=False) == "url"
+
+
+def test_subnet_prefixes():
+    snapshot = RknDumpSnapshot()
+    for value in ("10.1.0.0/16", "10.1.2.3/32", "2001:db8::/32", "не сеть/8"):
+        snapshot.add_ip(value)
+    assert snapshot.subnet_count == 3
+    assert snapshot.match("10.1.200.7") == "subnet"
+    assert snapshot.match("10.1.2.3") == "subnet"
+    assert snapshot.match("10.2.0.1") is None
+    assert snapshot.match("2001:db8:0:1::5") == "subnet"
+    assert snapshot.match("2001:db9::1") is None
+
+
+def test_unchanged_file_is_not_reloaded(tmp_path: Path):
+    path = tmp_path / "dump.csv"
+    path.write_bytes((FIXTURES / "rkn_dump.csv").read_bytes())
+    dump = RknDump()
+    assert dump.load(str(path)) is True
+    assert dump.load(str(path)) is False
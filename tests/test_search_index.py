@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+pytest.importorskip("transliterate")
+
+from bot.normalizer import split_search_query
+from bot.search_index import IndexSnapshot
+
+VECTORS = [
+    "ооо ромашка ooo romashka",
+    "фонд свобода слова fond svoboda slova",
+    "ано центр правозащита ano tsentr pravozashchita",
+    "союз я ты мы soyuz ya ty my",
+    "общество ромашково obshchestvo romashkovo",
+    "ab abc abcd",
+]
+
+
+def _like_reference(vectors: list[str], words: list[str]) -> bool:
+    # То же, что WHERE search_vector LIKE '%w1%' AND ... LIMIT 1
+    return any(all(word in vector for word in words) for vector in vectors)
+
+
+@pytest.fixture(scope="module")
+def snapshot() -> IndexSnapshot:
+    return IndexSnapshot(enumerate(VECTORS, 1))
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("ромашка", True),
+        ("омаш", True),
+        ("ромашка ooo", True),
+        ("ООО Ромашка", True),
+        ("ромашка свобода", False),
+        ("фонд слова", True),
+        ("я мы", True),
+        ("я", True),
+        ("ab", True),
+        ("abc abcd", True),
+        ("мы ромашка", False),
+        ("несуществующее", False),
+        ("zzz", False),
+        ("", False),
+    ],
+)
+def test_matches_like(snapshot: IndexSnapshot, query: str, expected: bool):
+    words = split_search_query(query)
+    assert snapshot.find_first_match(words) is expected
+    if words:
+        assert _like_reference(VECTORS, words) is expected
+
+
+def test_random_queries_match_like():
+    rng = random.Random(7)
+    alphabet = "абвгде"
+    vectors = [
+        " ".join(
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 7)))
+            for _ in range(rng.randint(1, 6))
+        )
+        for _ in range(300)
+    ]
+    snapshot = IndexSnapshot(enumerate(vectors, 1))
+    for _ in range(2000):
+        words = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        assert snapshot.find_first_match(words) is _like_reference(vectors, words)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+
+from scraper_tool import tracing
+from scraper_tool.tracing import current_correlation_id, span, start_trace, traced
+
+
+@traced()
+def _sync_step() -> str | None:
+    with span("inner"):
+        return current_correlation_id()
+
+
+@traced("async_step")
+async def _async_step() -> str | None:
+    await asyncio.sleep(0)
+    return await asyncio.to_thread(_sync_step)
+
+
+def test_span_nesting():
+    with start_trace("update", "upd-1") as trace:
+        with span("outer"):
+            with span("middle"):
+                with span("leaf"):
+                    pass
+            with span("sibling"):
+                pass
+        with span("second"):
+            pass
+    assert [(s["name"], s["depth"]) for s in trace.breakdown()] == [
+        ("outer", 0),
+        ("middle", 1),
+        ("leaf", 2),
+        ("sibling", 1),
+        ("second", 0),
+    ]
+    assert all(s["duration_ms"] is not None for s in trace.breakdown())
+
+
+def test_correlation_id_crosses_await_and_to_thread():
+    async def run():
+        with start_trace("job", "job-7") as trace:
+            seen = await _async_step()
+        return trace, seen
+
+    trace, seen = asyncio.run(run())
+    assert seen == "job-7"
+    assert [(s["name"], s["depth"]) for s in trace.breakdown()] == [
+        ("async_step", 0),
+        (_sync_step.__qualname__, 1),
+        ("inner", 2),
+    ]
+
+
+def test_concurrent_traces_do_not_mix():
+    async def handle(update_id: int):
+        with start_trace("update", f"upd-{update_id}") as trace:
+            for _ in range(3):
+                with span(f"step-{update_id}"):
+                    await asyncio.sleep(0)
+                    assert current_correlation_id() == f"upd-{update_id}"
+        return trace
+
+    async def run():
+        return await asyncio.gather(*(handle(i) for i in range(5)))
+
+    for update_id, trace in enumerate(asyncio.run(run())):
+        assert {s.name for s in trace.spans} == {f"step-{update_id}"}
+        assert all(s.depth == 0 for s in trace.spans)
+    assert current_correlation_id() is None
+
+
+def test_span_records_error():
+    with start_trace("update", "upd-2") as trace:
+        try:
+            with span("failing"):
+                raise KeyError("x")
+        except KeyError:
+            pass
+    assert trace.breakdown()[0]["error"] == "KeyError"
+
+
+def test_no_trace_is_noop():
+    assert current_correlation_id() is None
+    with span("orphan") as orphan:
+        pass
+    assert not isinstance(orphan, tracing.Span)
+
+
+def test_span_limit(monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_SPANS", 3)
+    with start_trace("update", "upd-3") as trace:
+        for i in range(5):
+            with span(f"s{i}"):
+                pass
+    assert len(trace.spans) == 3
+    assert trace.dropped == 2
+
+
+def test_slow_trace_is_logged_once(caplog):
+    with caplog.at_level(logging.WARNING, logger=tracing.__name__):
+        with start_trace("update", "upd-fast", slow_threshold=60):
+            with span("quick"):
+                pass
+        with start_trace("update", "upd-slow", slow_threshold=0):
+            with span("db"):
+                pass
+    assert len(caplog.records) == 1
+    record = caplog.records[0]
+    assert "upd-slow" in record.getMessage()
+    assert "db:" in record.getMessage()
+    assert record.spans[0]["name"] == "db"